@@ -1,20 +1,467 @@
-from flask import Flask, render_template, session, request, redirect, url_for, jsonify
+from flask import Flask, render_template, session, request, redirect, url_for, jsonify, g, has_request_context, abort
+from markupsafe import Markup, escape
 import json
 import os
 import re
+import hashlib
+import pickle
+import copy
+import threading
+import time
+from collections import namedtuple, Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 import random
+import bisect
 import markdown
+import numpy as np
+import csv
+import sqlite3
+import secrets
+import base64
+import heapq
+import itertools
+import zlib
+import functools
+import gc
+import contextlib
+try:
+    import fcntl
+except ImportError:  # Windows: the id registry is written without a lock
+    fcntl = None
 
 app = Flask(__name__)
 app.secret_key = 'ai900-study-app-secret-key'
+# The session cookie carries the progress user id, so it outlives the browser session
+app.permanent_session_lifetime = timedelta(days=int(os.environ.get('SESSION_LIFETIME_DAYS', 365)))
+
+# HTTP cache lifetimes for the quiz generation API
+QUIZ_CACHE_SECONDS = 3600
+QUESTIONS_CACHE_SECONDS = 365 * 24 * 3600
+
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite']
+
+def render_markdown(text):
+    """Render markdown text to HTML using the app's extensions"""
+    if text:
+        return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return text
 
 # Custom markdown filter
 @app.template_filter('markdown')
 def markdown_filter(text):
-    if text:
-        return markdown.markdown(text, extensions=['extra', 'codehilite'])
-    return text
+    return render_markdown(text)
+
+# Study material source files
+STUDY_FILES_DIR = 'study-files'
+OUTLINE_FILE = f'{STUDY_FILES_DIR}/Azure AI-900 Exam Study Guide Outline.md'
+TOPIC_FILE = STUDY_FILES_DIR + '/Azure AI-900 Exam Study Guide_ Topic {}.md'
+KEY_ESSENTIALS_FILE = f'{STUDY_FILES_DIR}/Azure AI-900 Exam Study Guide_ Key Essentials.md'
+PRACTICE_QUIZ_FILE = f'{STUDY_FILES_DIR}/Azure AI-900 Practice Quiz.md'
+
+# Line-level markdown token kinds
+MarkdownToken = namedtuple('MarkdownToken', ['kind', 'line', 'level', 'number', 'letter', 'text'])
+
+MARKDOWN_LINE_PATTERN = re.compile(
+    r'(?P<hashes>#{1,6})\s+(?P<heading>.*)'
+    r'|(?P<number>\d+)\.\s+(?:(?P<answer>[A-D])\)\s+)?(?P<item>.*)'
+    r'|-?\s*(?P<letter>[A-D])\)\s*(?P<option>.*)'
+)
+
+OUTLINE_TOPIC_PATTERN = re.compile(r'(\d+)\.\s+(.+?)\((\d+–\d+%)\)(.*)')
+QUIZ_TOPIC_PATTERN = re.compile(r'Topic\s+(\d+)\b')
+
+def tokenize_markdown(content):
+    """Scan markdown once, line by line, yielding MarkdownToken tuples.
+
+    Kinds are 'heading' (level, text), 'item' (a numbered line: number, text),
+    'answer' (a numbered answer line like "3. B) ...": number, letter, text),
+    'option' (a lettered option like "- A) ...": letter, text), 'blank' and
+    'text'. Every token keeps its raw line so callers can rebuild content.
+    Lines inside fenced code blocks are always 'text'.
+    """
+    in_fence = False
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_fence = not in_fence
+            yield MarkdownToken('text', line, 0, None, None, stripped)
+            continue
+        if in_fence:
+            yield MarkdownToken('text', line, 0, None, None, stripped)
+            continue
+        if not stripped:
+            yield MarkdownToken('blank', line, 0, None, None, '')
+            continue
+
+        match = MARKDOWN_LINE_PATTERN.fullmatch(stripped)
+        if not match:
+            yield MarkdownToken('text', line, 0, None, None, stripped)
+        elif match.group('hashes'):
+            yield MarkdownToken('heading', line, len(match.group('hashes')), None, None,
+                                match.group('heading').strip())
+        elif match.group('answer'):
+            yield MarkdownToken('answer', line, 0, int(match.group('number')),
+                                match.group('answer'), match.group('item').strip())
+        elif match.group('number'):
+            yield MarkdownToken('item', line, 0, int(match.group('number')), None,
+                                match.group('item').strip())
+        else:
+            yield MarkdownToken('option', line, 0, None, match.group('letter'),
+                                match.group('option').strip())
+
+class QuizOption(namedtuple('QuizOption', ['letter', 'text'])):
+    """Immutable answer option for a practice quiz question"""
+    __slots__ = ()
+
+class QuizQuestion(namedtuple('QuizQuestion', ['number', 'question', 'options', 'topic'])):
+    """Immutable practice quiz question; options is a tuple of QuizOption.
+
+    topic is the study topic number from the quiz's "## Topic N" heading, or
+    None for questions that appear before any topic heading.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """Plain dict form for JSON responses"""
+        return {
+            'number': self.number,
+            'topic': self.topic,
+            'question': self.question,
+            'options': [option._asdict() for option in self.options]
+        }
+
+class QuestionView:
+    """Per-request view of a shared QuizQuestion with its own option order.
+
+    The view only holds an index permutation into the record's options, so
+    shuffling never copies or mutates the question bank.
+    """
+    __slots__ = ('record', 'order')
+
+    def __init__(self, record, order):
+        self.record = record
+        self.order = order
+
+    @property
+    def number(self):
+        return self.record.number
+
+    @property
+    def question(self):
+        return self.record.question
+
+    @property
+    def options(self):
+        return [self.record.options[i] for i in self.order]
+
+def build_question_index(questions):
+    """Index question positions by topic and by question number"""
+    by_topic = {}
+    by_number = {}
+    for position, question in enumerate(questions):
+        by_number[question.number] = position
+        if question.topic is not None:
+            by_topic.setdefault(question.topic, []).append(position)
+    return {
+        'by_topic': {topic: tuple(positions) for topic, positions in sorted(by_topic.items())},
+        'by_number': by_number
+    }
+
+def parse_topic_filter(values, quiz_data):
+    """Turn 'topic_N' or 'N' strings into topic numbers present in the quiz"""
+    topics = []
+    for value in values:
+        try:
+            topic = int(str(value).replace('topic_', ''))
+        except ValueError:
+            continue
+        if topic in quiz_data['index']['by_topic'] and topic not in topics:
+            topics.append(topic)
+    return topics
+
+def sample_questions(quiz_data, count, topics=None, rng=random):
+    """Randomly pick up to count questions as views with shuffled options.
+
+    topics limits the draw to those topic numbers' prebuilt buckets. Random
+    positions are drawn across the combined buckets without concatenating
+    them, so the work is proportional to count rather than the bank size.
+    """
+    questions = quiz_data['questions']
+    if topics is None:
+        buckets = [range(len(questions))]
+    else:
+        buckets = [quiz_data['index']['by_topic'].get(topic, ()) for topic in topics]
+
+    offsets = []
+    total = 0
+    for bucket in buckets:
+        offsets.append(total)
+        total += len(bucket)
+
+    views = []
+    for pick in rng.sample(range(total), min(count, total)):
+        b = bisect.bisect_right(offsets, pick) - 1
+        question = questions[buckets[b][pick - offsets[b]]]
+        order = tuple(rng.sample(range(len(question.options)), len(question.options)))
+        views.append(QuestionView(question, order))
+    return views
+
+def question_summaries(questions):
+    """Number and text of each question, for the quiz page scripts"""
+    return [{'number': q.number, 'question': q.question} for q in questions]
+
+class AnswerKey:
+    """Practice quiz answer key compiled into NumPy arrays for batch grading.
+
+    Questions are columns ordered by question number. Letters are stored as
+    small integer codes so a whole batch of submissions is graded with one
+    array comparison, and per-topic totals come from a matrix product with a
+    question-to-topic one-hot matrix.
+    """
+
+    LETTERS = 'ABCD'
+    LETTER_CODES = {letter: code for code, letter in enumerate(LETTERS)}
+    UNANSWERED = -1
+    INVALID = -2
+
+    def __init__(self, quiz_data):
+        answers = quiz_data.get('answers', {})
+        index = quiz_data.get('index', {'by_number': {}, 'by_topic': {}})
+        self.numbers = np.array(sorted(answers), dtype=np.int32)
+        self.columns = {int(number): column for column, number in enumerate(self.numbers)}
+        self.correct = np.array([self.LETTERS.index(answers[n]['correct']) for n in self.numbers], dtype=np.int8)
+        self.topic_ids = list(index['by_topic'])
+
+        # Question-to-topic one-hot matrix (questions without a topic have no 1)
+        self.topic_matrix = np.zeros((len(self.numbers), len(self.topic_ids)), dtype=np.int32)
+        topic_columns = {topic: column for column, topic in enumerate(self.topic_ids)}
+        for number, column in self.columns.items():
+            position = index['by_number'].get(number)
+            if position is None:
+                continue
+            topic = quiz_data['questions'][position].topic
+            if topic in topic_columns:
+                self.topic_matrix[column, topic_columns[topic]] = 1
+
+    def encode(self, submissions):
+        """Encode answer dicts ({question number: letter}) into a response matrix"""
+        responses = np.full((len(submissions), len(self.numbers)), self.UNANSWERED, dtype=np.int8)
+        for row, answers in enumerate(submissions):
+            for q_num, letter in answers.items():
+                try:
+                    column = self.columns.get(int(q_num))
+                except (TypeError, ValueError):
+                    continue
+                if column is None:
+                    continue
+                letter = str(letter).strip().upper()
+                responses[row, column] = self.LETTER_CODES.get(letter, self.INVALID)
+        return responses
+
+    def grade(self, submissions):
+        """Grade many submissions at once.
+
+        Returns a dict of arrays: 'responses' (the encoded letters),
+        'correct' and 'answered' (submissions x questions, bool), 'score' and 'answered_count' (per submission), and
+        'topic_correct' / 'topic_total' (submissions x topics, in the order
+        of self.topic_ids).
+        """
+        responses = self.encode(submissions)
+        answered = responses != self.UNANSWERED
+        correct = responses == self.correct
+        return {
+            'responses': responses,
+            'correct': correct,
+            'answered': answered,
+            'score': correct.sum(axis=1),
+            'answered_count': answered.sum(axis=1),
+            'topic_correct': correct.astype(np.int32) @ self.topic_matrix,
+            'topic_total': answered.astype(np.int32) @ self.topic_matrix
+        }
+
+    def column(self, q_num):
+        """Column for a question number, or None if it isn't in the key"""
+        return self.columns.get(q_num)
+
+# Worker processes used to parse study files (1 parses serially). Unset, a
+# pool of one worker per CPU is only started for study files totalling at
+# least PARALLEL_PARSE_MIN_BYTES: the bundled ~65 KB parse in ~0.12 s, less
+# than starting the pool costs.
+PARSE_WORKERS = int(os.environ['STUDY_PARSE_WORKERS']) if os.environ.get('STUDY_PARSE_WORKERS') else None
+PARALLEL_PARSE_MIN_BYTES = 512 * 1024
+
+# Flashcard generation pipeline
+FlashcardSource = namedtuple('FlashcardSource', ['kind', 'title', 'text', 'topic'])
+FLASHCARD_IDS_FILE = os.environ.get('FLASHCARD_IDS', os.path.join('data', 'flashcard_ids.json'))
+# "2.1.1 Identify Features of the Transformer Architecture" -> "Transformer Architecture"
+HEADING_TERM_PREFIX = re.compile(
+    r'^[\d.]*\s*(?:Identify|Describe)\s+'
+    r'(?:(?:Features|Capabilities|Considerations)(?:\s+and\s+(?:Uses|Capabilities))?\s+(?:of|for)\s+(?:the\s+)?)?')
+HEADING_TERM_SUFFIX = re.compile(
+    r'\s+(?:in an AI Solution|Machine Learning Scenarios|Workloads?|Solutions?|Scenarios|Techniques|Service)$')
+# "Identify Common AI Workloads" -> "Common AI" names a group of topics, not a term
+HEADING_TERM_SKIP = re.compile(r'^Common\b')
+BOLD_TERM_PATTERN = re.compile(r'\*\*([^*]+)\*\*(:?)')
+
+def normalize_term(term):
+    """Case- and whitespace-insensitive form of a flashcard term"""
+    return ' '.join(term.lower().split())
+
+def flashcard_key(term):
+    """Stable identity for a flashcard: a short hash of its normalized term"""
+    return hashlib.sha1(normalize_term(term).encode('utf-8')).hexdigest()[:12]
+
+def dedupe_flashcards(cards):
+    """Yield cards whose term hasn't been seen yet, first one wins"""
+    seen = set()
+    for card in cards:
+        key = flashcard_key(card['term'])
+        if key not in seen:
+            seen.add(key)
+            card['key'] = key
+            yield card
+
+# Near-duplicate detection: MinHash signatures banded for LSH
+MINHASH_BANDS = 32
+MINHASH_ROWS = 4
+MINHASH_PRIME = (1 << 31) - 1
+NEAR_DUPLICATE_THRESHOLD = 0.5  # Jaccard similarity of definition shingle sets
+NEAR_DUPLICATE_TERM_THRESHOLD = 0.9  # Jaccard similarity of normalized-term trigrams
+_minhash_rng = np.random.RandomState(900)
+MINHASH_A = _minhash_rng.randint(1, MINHASH_PRIME, MINHASH_BANDS * MINHASH_ROWS).astype(np.uint64)
+MINHASH_B = _minhash_rng.randint(0, MINHASH_PRIME, MINHASH_BANDS * MINHASH_ROWS).astype(np.uint64)
+
+# Words that don't distinguish one term from another, and acronyms spelled out
+# so "Automated ML" and "Automated Machine Learning" compare equal
+TERM_NOISE_WORDS = frozenset(['azure', 'ai', 'microsoft', 'service', 'services'])
+TERM_ACRONYMS = {
+    'ml': 'machine learning',
+    'nlp': 'natural language processing',
+    'ocr': 'optical character recognition'
+}
+PARENTHETICAL_PATTERN = re.compile(r'\([^)]*\)')
+
+def comparable_term(term):
+    """Term reduced for near-duplicate matching.
+
+    Parentheticals and noise words are dropped, known acronyms spelled out
+    and any other all-caps acronym removed.
+    """
+    words = []
+    for word in re.findall(r'[A-Za-z0-9]+', PARENTHETICAL_PATTERN.sub(' ', term)):
+        lower = word.lower()
+        if lower in TERM_ACRONYMS:
+            words.extend(TERM_ACRONYMS[lower].split())
+        elif lower not in TERM_NOISE_WORDS and not (len(word) > 1 and word.isupper()):
+            words.append(lower)
+    return ' '.join(words)
+
+def term_shingles(card):
+    """Hashed character trigrams of a card's comparable term, and the numbers in it.
+
+    Numbers must match exactly for terms to count as the same, since
+    trigrams barely tell "Topic 1.1" from "Topic 1.11".
+    """
+    term = comparable_term(card['term'])
+    if len(term) < 3:
+        return set(), ()
+    padded = f' {term} '
+    return {zlib.crc32(padded[i:i + 3].encode('utf-8')) for i in range(len(padded) - 2)}, tuple(re.findall(r'\d+', term))
+
+def flashcard_shingles(card):
+    """Hashed word pairs of a card's definition"""
+    words = re.findall(r'[a-z0-9]+', card['definition'].lower())
+    return {zlib.crc32(f'{a} {b}'.encode('utf-8')) for a, b in zip(words, words[1:])}
+
+def minhash_signature(shingles):
+    """MinHash signature of a set of 32-bit shingle hashes"""
+    hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    return ((MINHASH_A[:, None] * hashes[None, :] + MINHASH_B[:, None]) % MINHASH_PRIME).min(axis=1)
+
+def lsh_bands(shingles, family):
+    """LSH band keys for a shingle set; family keeps term and definition bands apart"""
+    if not shingles:
+        return []
+    signature = minhash_signature(shingles).astype(np.uint32).tobytes()
+    band_bytes = MINHASH_ROWS * 4
+    return [(family * MINHASH_BANDS + band).to_bytes(1, 'little') + signature[band * band_bytes:(band + 1) * band_bytes]
+            for band in range(MINHASH_BANDS)]
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def merge_near_duplicates(cards):
+    """Yield cards, folding near-duplicates into the first card of their cluster.
+
+    Two cards are near-duplicates when their comparable terms are nearly the
+    same ("Azure OpenAI Service" / "Azure OpenAI") or their definitions
+    largely overlap. Terms and definitions get separate MinHash signatures,
+    split into LSH bands, and each band bucket remembers the first kept card
+    that landed in it. A new card is only compared with those cards, so the
+    pass is linear in the deck size. A duplicate's term is recorded in the
+    kept card's aliases.
+    """
+    buckets = {}
+    kept = []
+    for card in cards:
+        terms, numbers = term_shingles(card)
+        definition = flashcard_shingles(card)
+        bands = lsh_bands(terms, 0) + lsh_bands(definition, 1)
+
+        duplicate_of = None
+        for index in sorted({buckets[band] for band in bands if band in buckets}):
+            other, other_terms, other_numbers, other_definition = kept[index]
+            if ((numbers == other_numbers and jaccard(terms, other_terms) >= NEAR_DUPLICATE_TERM_THRESHOLD) or
+                    jaccard(definition, other_definition) >= NEAR_DUPLICATE_THRESHOLD):
+                duplicate_of = other
+                break
+
+        if duplicate_of is not None:
+            duplicate_of.setdefault('aliases', []).append(card['term'])
+            continue
+
+        for band in bands:
+            buckets.setdefault(band, len(kept))
+        kept.append((card, terms, numbers, definition))
+        yield card
+
+def load_flashcard_ids(path):
+    """Read the term key -> card id registry, or {} if there isn't one"""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading flashcard ids: {e}")
+        return {}
+
+def save_flashcard_ids(ids, path):
+    """Write the card id registry atomically"""
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(ids, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error saving flashcard ids: {e}")
+
+@contextlib.contextmanager
+def flashcard_ids_lock(path):
+    """Hold an exclusive lock on the card id registry (via a .lock file beside it)"""
+    if not path or fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 class StudyContentParser:
     def __init__(self):
@@ -23,22 +470,38 @@ class StudyContentParser:
         self.key_essentials = {}
         self.outline = {}
         self.flashcards = {}
+        self.flashcard_ids = None  # term key -> card id from the last deck built
+        self.flashcard_ids_file = FLASHCARD_IDS_FILE
+
+    def parse_all_content(self, workers=None):
+        """Parse all study materials into structured format.
 
-    def parse_all_content(self):
-        """Parse all study materials into structured format"""
+        Each source file is parsed independently, across a process pool when
+        more than one worker is configured (see PARSE_WORKERS), and the
+        results are merged in source order before flashcards are generated
+        from the merged content.
+        """
         try:
-            # Parse outline
-            self.outline = self.parse_outline()
+            sources = list(self.content_sources())
+            if workers is None:
+                workers = PARSE_WORKERS
+            if workers is None:
+                workers = (os.cpu_count() or 1) if self.content_size() >= PARALLEL_PARSE_MIN_BYTES else 1
+            workers = min(workers, len(sources))
             
-            # Parse each topic
-            for i in range(1, 6):
-                self.topics[f"topic_{i}"] = self.parse_topic(i)
-                
-            # Parse key essentials
-            self.key_essentials = self.parse_key_essentials()
+            results = None
+            if workers > 1:
+                try:
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        results = dict(executor.map(parse_content_source, sources))
+                except (OSError, BrokenProcessPool) as e:
+                    print(f"Parallel parsing unavailable, parsing serially: {e}")
+            if results is None:
+                results = {key: self.read_source(key) for key in sources}
             
-            # Parse practice quiz
-            self.practice_quiz = self.parse_practice_quiz()
+            # Merge in source order so the result never depends on worker timing
+            for key in sources:
+                self.apply_source(key, results[key])
 
             # Generate flashcards from content
             self.flashcards = self.generate_flashcards()
@@ -47,11 +510,50 @@ class StudyContentParser:
         except Exception as e:
             print(f"Error parsing content: {e}")
             return False
+
+    def content_size(self):
+        """Total bytes of the study files, 0 for any that are missing"""
+        return sum(os.path.getsize(path) for path in self.content_sources().values() if os.path.exists(path))
+
+    def content_sources(self):
+        """Map each content key to the study file it is parsed from"""
+        sources = {'outline': OUTLINE_FILE}
+        for i in range(1, 6):
+            sources[f'topic_{i}'] = TOPIC_FILE.format(i)
+        sources['key_essentials'] = KEY_ESSENTIALS_FILE
+        sources['practice_quiz'] = PRACTICE_QUIZ_FILE
+        return sources
+
+    def read_source(self, key):
+        """Parse a single content source and return the parsed data"""
+        if key == 'outline':
+            return self.parse_outline()
+        if key.startswith('topic_'):
+            return self.parse_topic(int(key.split('_')[1]))
+        if key == 'key_essentials':
+            return self.parse_key_essentials()
+        if key == 'practice_quiz':
+            return self.parse_practice_quiz()
+        raise KeyError(f'Unknown content source: {key}')
+
+    def apply_source(self, key, parsed):
+        """Store parsed data for a content source on the parser"""
+        if key.startswith('topic_'):
+            self.topics[key] = parsed
+        else:
+            setattr(self, key, parsed)
+
+    def parse_source(self, key):
+        """Re-parse a single content source, returning True if it parsed cleanly"""
+        parsed = self.read_source(key)
+        if parsed:
+            self.apply_source(key, parsed)
+        return bool(parsed)
     
     def parse_outline(self):
         """Parse the study guide outline"""
         try:
-            with open('study-files/Azure AI-900 Exam Study Guide Outline.md', 'r', encoding='utf-8') as f:
+            with open(OUTLINE_FILE, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             outline = {
@@ -59,18 +561,25 @@ class StudyContentParser:
                 'topics': []
             }
             
-            # Extract topic sections
-            topic_pattern = r'## (\d+)\.\s+(.+?)\((\d+–\d+%)\)(.*?)(?=## \d+\.|$)'
-            matches = re.findall(topic_pattern, content, re.DOTALL)
+            # Each "## N. Title (x–y%)" heading starts a topic
+            topic_lines = []
+            for token in tokenize_markdown(content):
+                if token.kind == 'heading' and token.level == 2:
+                    match = OUTLINE_TOPIC_PATTERN.match(token.text)
+                    if match:
+                        topic_num, title, percentage, rest = match.groups()
+                        outline['topics'].append({
+                            'number': int(topic_num),
+                            'title': title.strip(),
+                            'percentage': percentage
+                        })
+                        topic_lines.append([rest])
+                        continue
+                if topic_lines:
+                    topic_lines[-1].append(token.line)
             
-            for match in matches:
-                topic_num, title, percentage, content_text = match
-                outline['topics'].append({
-                    'number': int(topic_num),
-                    'title': title.strip(),
-                    'percentage': percentage,
-                    'content': content_text.strip()
-                })
+            for topic, lines in zip(outline['topics'], topic_lines):
+                topic['content'] = '\n'.join(lines).strip()
             
             return outline
         except Exception as e:
@@ -80,46 +589,53 @@ class StudyContentParser:
     def parse_topic(self, topic_num):
         """Parse individual topic file"""
         try:
-            filename = f'study-files/Azure AI-900 Exam Study Guide_ Topic {topic_num}.md'
+            filename = TOPIC_FILE.format(topic_num)
             with open(filename, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            topic = {
-                'number': topic_num,
-                'title': '',
-                'sections': []
-            }
-            
-            # Extract title
-            title_match = re.search(r'# (.+)', content)
-            if title_match:
-                topic['title'] = title_match.group(1)
-            
-            # Split content into sections and subsections
-            sections = self.split_into_study_chunks(content)
-            topic['sections'] = sections
-            
-            return topic
+            return self.parse_topic_content(topic_num, content)
         except Exception as e:
             print(f"Error parsing topic {topic_num}: {e}")
             return {}
     
+    def parse_topic_content(self, topic_num, content):
+        """Parse topic markdown into a title and study sections"""
+        topic = {
+            'number': topic_num,
+            'title': '',
+            'sections': []
+        }
+        
+        # Title is the first heading in the file
+        for token in tokenize_markdown(content):
+            if token.kind == 'heading':
+                topic['title'] = token.text
+                break
+        
+        # Split content into sections and subsections
+        topic['sections'] = self.split_into_study_chunks(content)
+        
+        return topic
+    
+    def split_markdown_sections(self, content, min_level):
+        """Split markdown into (title, body) pairs at headings of min_level or deeper"""
+        sections = []
+        body = None
+        for token in tokenize_markdown(content):
+            if token.kind == 'heading' and token.level >= min_level:
+                body = []
+                sections.append((token.text, body))
+            elif body is not None:
+                body.append(token.line)
+        
+        return [(title, '\n'.join(lines).strip()) for title, lines in sections]
+    
     def split_into_study_chunks(self, content):
         """Split content into bite-sized study chunks"""
         sections = []
         
-        # Split by major sections (###)
-        section_pattern = r'###\s+(.+?)(?=###|\Z)'
-        section_matches = re.findall(section_pattern, content, re.DOTALL)
-        
-        for i, section_content in enumerate(section_matches):
-            lines = section_content.strip().split('\n')
-            if not lines:
-                continue
-                
-            section_title = lines[0].strip()
-            section_text = '\n'.join(lines[1:]).strip()
-            
+        # Split by major sections (### and deeper)
+        for section_title, section_text in self.split_markdown_sections(content, 3):
             # Further split large sections into smaller chunks
             chunks = self.create_study_chunks(section_text)
             
@@ -145,10 +661,7 @@ class StudyContentParser:
                 
             # If adding this paragraph would make chunk too long, start new chunk
             if len(current_chunk) + len(paragraph) > 800 and current_chunk:
-                chunks.append({
-                    'content': current_chunk.strip(),
-                    'type': 'content'
-                })
+                chunks.append(self.make_chunk(current_chunk))
                 current_chunk = paragraph
             else:
                 if current_chunk:
@@ -158,17 +671,23 @@ class StudyContentParser:
         
         # Add final chunk
         if current_chunk:
-            chunks.append({
-                'content': current_chunk.strip(),
-                'type': 'content'
-            })
+            chunks.append(self.make_chunk(current_chunk))
         
         return chunks
+
+    def make_chunk(self, text):
+        """Build a study chunk with its markdown pre-rendered to HTML"""
+        content = text.strip()
+        return {
+            'content': content,
+            'html': render_markdown(content),
+            'type': 'content'
+        }
     
     def parse_key_essentials(self):
         """Parse key essentials file"""
         try:
-            with open('study-files/Azure AI-900 Exam Study Guide_ Key Essentials.md', 'r', encoding='utf-8') as f:
+            with open(KEY_ESSENTIALS_FILE, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             essentials = {
@@ -176,19 +695,13 @@ class StudyContentParser:
                 'sections': []
             }
             
-            # Split into major sections
-            section_pattern = r'##\s+(.+?)(?=##|\Z)'
-            sections = re.findall(section_pattern, content, re.DOTALL)
-            
-            for section in sections:
-                lines = section.strip().split('\n')
-                if lines:
-                    title = lines[0].strip()
-                    content_text = '\n'.join(lines[1:]).strip()
-                    essentials['sections'].append({
-                        'title': title,
-                        'content': content_text
-                    })
+            # Split into major sections (## and deeper)
+            for title, content_text in self.split_markdown_sections(content, 2):
+                essentials['sections'].append({
+                    'title': title,
+                    'content': content_text,
+                    'html': render_markdown(content_text)
+                })
             
             return essentials
         except Exception as e:
@@ -198,125 +711,171 @@ class StudyContentParser:
     def parse_practice_quiz(self):
         """Parse practice quiz with questions and answers"""
         try:
-            with open('study-files/Azure AI-900 Practice Quiz.md', 'r', encoding='utf-8') as f:
+            with open(PRACTICE_QUIZ_FILE, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            quiz = {
-                'title': 'Azure AI-900 Practice Quiz',
-                'questions': [],
-                'answers': {}
-            }
-            
-            # Extract all content before answers section
-            questions_section = re.search(r'# Azure AI-900 Practice Quiz.*?(?=# Answers)', content, re.DOTALL)
-            if questions_section:
-                questions_text = questions_section.group(0)
-                
-                # Parse individual questions - more flexible pattern
-                question_pattern = r'(\d+)\.\s+(.+?)(?=(?:\d+\.\s+|\Z))'
-                questions = re.findall(question_pattern, questions_text, re.DOTALL)
-                
-                for q_num, q_content in questions:
-                    question_data = self.parse_question(q_num, q_content)
-                    if question_data:
-                        quiz['questions'].append(question_data)
-            
-            # Extract answers
-            answers_section = re.search(r'# Answers and Explanations\n\n(.+)', content, re.DOTALL)
-            if answers_section:
-                answers_text = answers_section.group(1)
-                quiz['answers'] = self.parse_answers(answers_text)
-            
-            return quiz
+            return self.parse_quiz_content(content)
         except Exception as e:
             print(f"Error parsing practice quiz: {e}")
             return {}
     
-    def parse_question(self, q_num, q_content):
-        """Parse individual question"""
-        lines = q_content.strip().split('\n')
-        if len(lines) < 2:
-            return None
-        
-        question_text = lines[0].strip()
-        options = []
-        
-        for line in lines[1:]:
-            line = line.strip()
-            # Handle both formats: "- A) text" and "A) text"
-            if re.match(r'^-?\s*[A-D]\)', line):
-                # Remove leading "- " if present
-                clean_line = re.sub(r'^-\s*', '', line)
-                option_letter = clean_line[0]
-                option_text = clean_line[3:].strip()
-                options.append({
-                    'letter': option_letter,
-                    'text': option_text
-                })
-        
-        return {
-            'number': int(q_num),
-            'question': question_text,
-            'options': options
+    def parse_quiz_content(self, content):
+        """Parse quiz markdown in a single pass over its tokens.
+
+        Numbered items before the "# Answers" heading are questions and the
+        lettered options under them are their choices; each question is tagged
+        with the topic of the "## Topic N" heading it sits under. Numbered
+        "N. X)" lines after it are answers, with any following lines joined
+        into the explanation.
+        """
+        quiz = {
+            'title': 'Azure AI-900 Practice Quiz',
+            'questions': [],
+            'answers': {}
         }
-    
-    def parse_answers(self, answers_text):
-        """Parse answer explanations"""
-        answers = {}
         
-        # Pattern to match answer lines
-        answer_pattern = r'(\d+)\.\s+([A-D])\)\s+(.+?)(?=\d+\.\s+|\Z)'
-        matches = re.findall(answer_pattern, answers_text, re.DOTALL)
+        in_answers = False
+        questions = []
+        question = None
+        explanation = None
+        topic = None
         
-        for match in matches:
-            q_num, correct_answer, explanation = match
-            answers[int(q_num)] = {
-                'correct': correct_answer,
-                'explanation': explanation.strip()
-            }
+        for token in tokenize_markdown(content):
+            if token.kind == 'heading' and token.level == 1:
+                in_answers = token.text.startswith('Answers')
+                question = None
+                explanation = None
+            elif in_answers:
+                if token.kind == 'answer':
+                    explanation = [token.text]
+                    quiz['answers'][token.number] = {
+                        'correct': token.letter,
+                        'explanation': explanation
+                    }
+                elif token.kind == 'item' or token.kind == 'heading':
+                    explanation = None
+                elif explanation is not None and token.kind != 'blank':
+                    explanation.append(token.text)
+            elif token.kind == 'heading':
+                match = QUIZ_TOPIC_PATTERN.match(token.text)
+                if match:
+                    topic = int(match.group(1))
+            elif token.kind in ('item', 'answer'):
+                text = token.text if token.kind == 'item' else f'{token.letter}) {token.text}'
+                question = (token.number, text, [], topic)
+                questions.append(question)
+            elif token.kind == 'option' and question is not None:
+                question[2].append(QuizOption(token.letter, token.text))
         
-        return answers
+        # Questions need options to be answerable
+        quiz['questions'] = tuple(
+            QuizQuestion(number, text, tuple(options), topic)
+            for number, text, options, topic in questions if options
+        )
+        quiz['index'] = build_question_index(quiz['questions'])
+        quiz['version'] = hashlib.sha256(repr(quiz['questions']).encode('utf-8')).hexdigest()[:12]
+        for answer in quiz['answers'].values():
+            answer['explanation'] = '\n'.join(answer['explanation']).strip()
+        
+        return quiz
 
     def generate_flashcards(self):
-        """Generate flashcards from study content"""
-        flashcards = []
+        """Generate flashcards by streaming study content through the extraction pipeline.
+
+        Sources -> term extraction -> difficulty scoring -> exact dedup ->
+        near-duplicate merging -> id assignment are chained generators, so
+        every chunk of every topic is visited once.
+        """
+        cards = self.extract_flashcards(self.flashcard_sources())
+        cards = self.score_flashcards(cards)
+        cards = dedupe_flashcards(cards)
+        cards = merge_near_duplicates(cards)
+        return list(self.assign_flashcard_ids(cards))
+
+    def flashcard_sources(self):
+        """Yield the content flashcards are drawn from, highest priority first.
 
-        # Extract from key essentials vocabulary section
+        Curated cards come before topic extraction so their definitions win
+        when a term appears in both.
+        """
+        # Key essentials vocabulary section
         if self.key_essentials and 'sections' in self.key_essentials:
             for section in self.key_essentials['sections']:
-                if 'vocabulary' in section.get('title', '').lower() or 'key' in section.get('title', '').lower():
-                    content = section.get('content', '')
-                    # Parse vocabulary table format
-                    flashcards.extend(self.extract_vocab_flashcards(content))
+                title = section.get('title', '')
+                if 'vocabulary' in title.lower() or 'key' in title.lower():
+                    yield FlashcardSource('vocab', title, section.get('content', ''), None)
 
-        # Extract from topics
+        # Manual flashcards for key concepts
+        yield FlashcardSource('manual', None, None, None)
+
+        # Every chunk of every topic section
         for topic_key, topic_data in self.topics.items():
             if topic_data and 'sections' in topic_data:
                 topic_num = topic_data.get('number', 0)
                 for section in topic_data['sections']:
-                    section_content = section.get('content', '')
-                    flashcards.extend(self.extract_topic_flashcards(section_content, topic_num))
+                    for index, chunk in enumerate(section.get('chunks', [])):
+                        kind = 'topic_heading' if index == 0 else 'topic'
+                        yield FlashcardSource(kind, section.get('title', ''), chunk['content'], topic_num)
 
-        # Add manual flashcards for key concepts
-        manual_cards = self.create_manual_flashcards()
-        flashcards.extend(manual_cards)
+    def extract_flashcards(self, sources):
+        """Yield raw term/definition cards from each source"""
+        for source in sources:
+            if source.kind == 'vocab':
+                yield from self.extract_vocab_flashcards(source.text)
+            elif source.kind == 'manual':
+                yield from self.create_manual_flashcards()
+            else:
+                if source.kind == 'topic_heading':
+                    card = self.extract_heading_flashcard(source.title, source.text, source.topic)
+                    if card:
+                        yield card
+                yield from self.extract_topic_flashcards(source.text, source.topic)
 
-        # Remove duplicates and assign IDs
-        seen_terms = set()
-        unique_flashcards = []
-        for card in flashcards:
-            term_key = card['term'].lower().strip()
-            if term_key not in seen_terms:
-                seen_terms.add(term_key)
-                card['id'] = len(unique_flashcards) + 1
-                unique_flashcards.append(card)
+    def score_flashcards(self, cards):
+        """Yield cards with a difficulty, assessing any that don't have one"""
+        for card in cards:
+            if not card.get('difficulty'):
+                card['difficulty'] = self.assess_difficulty([card['definition']])
+            yield card
 
-        return unique_flashcards
+    def assign_flashcard_ids(self, cards):
+        """Yield cards with stable ids from the term key registry.
 
-    def extract_vocab_flashcards(self, content):
-        """Extract flashcards from vocabulary-style content"""
-        flashcards = []
+        Ids are dense integers so progress bitsets stay small. A term keeps
+        its id across reloads and restarts; new terms get the next free id
+        and the registry is saved once the deck is complete. The registry
+        file is locked and re-read for the whole assignment, so processes
+        building decks at once (app workers, run.py build) never hand the
+        same new id to different terms or drop each other's new terms.
+        """
+        with flashcard_ids_lock(self.flashcard_ids_file):
+            registry = load_flashcard_ids(self.flashcard_ids_file)
+            ids = dict(registry)
+            # Keep ids this process already uses (e.g. from a compiled artifact)
+            # unless the registry has since given the term or the id to another
+            known = dict(self.flashcard_ids or {})
+            for card in self.flashcards or ():
+                known.setdefault(card['key'], card['id'])
+            used = set(ids.values())
+            for key, card_id in known.items():
+                if key not in ids and card_id not in used:
+                    ids[key] = card_id
+                    used.add(card_id)
 
+            next_id = max(ids.values(), default=0) + 1
+            for card in cards:
+                if card['key'] not in ids:
+                    ids[card['key']] = next_id
+                    next_id += 1
+                card['id'] = ids[card['key']]
+                yield card
+
+            self.flashcard_ids = ids
+            if ids != registry and self.flashcard_ids_file:
+                save_flashcard_ids(ids, self.flashcard_ids_file)
+
+    def extract_vocab_flashcards(self, content):
+        """Yield flashcards from vocabulary-style content"""
         # Look for term: definition patterns
         lines = content.split('\n')
         current_term = None
@@ -330,12 +889,11 @@ class StudyContentParser:
             # Check for term pattern (Term: definition)
             if ':' in line and len(line.split(':')[0].strip()) < 50:  # Avoid long lines
                 if current_term and current_definition:
-                    flashcards.append({
+                    yield {
                         'term': current_term,
                         'definition': ' '.join(current_definition),
-                        'category': 'vocabulary',
-                        'difficulty': self.assess_difficulty(current_definition)
-                    })
+                        'category': 'vocabulary'
+                    }
 
                 parts = line.split(':', 1)
                 current_term = parts[0].strip()
@@ -345,52 +903,57 @@ class StudyContentParser:
 
         # Add the last card
         if current_term and current_definition:
-            flashcards.append({
+            yield {
                 'term': current_term,
                 'definition': ' '.join(current_definition),
-                'category': 'vocabulary',
-                'difficulty': self.assess_difficulty(current_definition)
-            })
+                'category': 'vocabulary'
+            }
 
-        return flashcards
+    def extract_heading_flashcard(self, title, content, topic_num):
+        """Card from a topic heading and the paragraph that opens its section"""
+        term = HEADING_TERM_SUFFIX.sub('', HEADING_TERM_PREFIX.sub('', title)).strip()
+        paragraph = content.split('\n\n', 1)[0].strip()
+        if not term or term == title.strip() or HEADING_TERM_SKIP.match(term):
+            return None
+        if len(paragraph) <= 20 or paragraph.startswith(('-', '#', '|')):
+            return None
+        return {
+            'term': term,
+            'definition': ' '.join(paragraph.split()),
+            'category': f'topic_{topic_num}'
+        }
 
     def extract_topic_flashcards(self, content, topic_num):
-        """Extract flashcards from topic content"""
-        flashcards = []
-
+        """Yield flashcards for bold terms in topic content"""
         # Look for key terms and their explanations
         lines = content.split('\n')
         for i, line in enumerate(lines):
             line = line.strip()
-            if not line:
+            if '**' not in line:
+                continue
+
+            # Bold term followed by its explanation; "**Label**:" list headers are skipped
+            term_match = BOLD_TERM_PATTERN.search(line)
+            if not term_match or term_match.group(2):
                 continue
+            term = term_match.group(1).strip()
+
+            # Get the next few lines as definition
+            definition_lines = []
+            for j in range(i + 1, min(i + 4, len(lines))):
+                next_line = lines[j].strip()
+                if next_line and not next_line.startswith('###') and not next_line.startswith('**'):
+                    definition_lines.append(next_line)
+                else:
+                    break
 
-            # Look for bold/italic terms followed by explanations
-            if '**' in line or '*' in line:
-                # Extract term and definition from markdown formatting
-                term_match = re.search(r'\*\*([^*]+)\*\*', line)
-                if term_match:
-                    term = term_match.group(1).strip()
-                    # Get the next few lines as definition
-                    definition_lines = []
-                    for j in range(i + 1, min(i + 4, len(lines))):
-                        next_line = lines[j].strip()
-                        if next_line and not next_line.startswith('###') and not next_line.startswith('**'):
-                            definition_lines.append(next_line)
-                        else:
-                            break
-
-                    if definition_lines:
-                        definition = ' '.join(definition_lines)
-                        if len(definition) > 20:  # Ensure meaningful definition
-                            flashcards.append({
-                                'term': term,
-                                'definition': definition,
-                                'category': f'topic_{topic_num}',
-                                'difficulty': 'medium'
-                            })
-
-        return flashcards
+            definition = ' '.join(definition_lines)
+            if len(definition) > 20:  # Ensure meaningful definition
+                yield {
+                    'term': term,
+                    'definition': definition,
+                    'category': f'topic_{topic_num}'
+                }
 
     def create_manual_flashcards(self):
         """Create manually curated flashcards for key concepts"""
@@ -565,97 +1128,1788 @@ class StudyContentParser:
             }
         ]
 
-    def assess_difficulty(self, definition_lines):
-        """Assess difficulty level based on content complexity"""
-        definition = ' '.join(definition_lines).lower()
+    def assess_difficulty(self, definition_lines):
+        """Assess difficulty level based on content complexity"""
+        definition = ' '.join(definition_lines).lower()
+
+        # Count complex terms
+        complex_terms = ['transformer', 'neural network', 'algorithm', 'architecture', 'embeddings', 'unsupervised', 'supervised']
+        complex_count = sum(1 for term in complex_terms if term in definition)
+
+        # Length-based assessment
+        length = len(definition)
+
+        if complex_count >= 2 or length > 300:
+            return 'hard'
+        elif complex_count == 1 or length > 150:
+            return 'medium'
+        else:
+            return 'easy'
+
+def parse_content_source(key):
+    """Parse one content source in a worker process, returning (key, data)"""
+    return key, StudyContentParser().read_source(key)
+
+# Initialize content parser
+content_parser = StudyContentParser()
+study_data = {}
+
+# Compiled content artifact settings
+ARTIFACT_DIR = 'build'
+ARTIFACT_FORMAT_VERSION = 17
+
+def build_study_data(parser):
+    """Assemble the study_data snapshot from a parser that has parsed all content"""
+    documents = search_documents(parser)
+    buckets = build_flashcard_buckets(parser.flashcards)
+    return {
+        'outline': parser.outline,
+        'topics': parser.topics,
+        'key_essentials': parser.key_essentials,
+        'practice_quiz': parser.practice_quiz,
+        'answer_key': AnswerKey(parser.practice_quiz),
+        'flashcards': parser.flashcards,
+        'flashcards_by_id': {card['id']: card for card in parser.flashcards},
+        'flashcard_buckets': buckets,
+        'flashcard_filters': build_flashcard_filters(buckets),
+        'flashcard_deck_version': flashcard_deck_version(parser.flashcards),
+        'search_index': SearchIndex(documents),
+        'suggest_index': SuggestIndex(suggest_entries(parser)),
+        'related': RelatedContent(documents)
+    }
+
+# Full-text search
+SearchDocument = namedtuple('SearchDocument', ['kind', 'key', 'title', 'text', 'endpoint', 'params', 'anchor'])
+SEARCH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+SEARCH_STOPWORDS = frozenset(
+    'a an and are as at be by can for from how in into is it its of on or that the their this to what '
+    'when which with you your'.split())
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 180
+
+def search_token(word):
+    """Normalize one lowercased word for the index, folding simple plurals"""
+    if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def search_tokens(text):
+    """Index tokens for a piece of text, without stopwords"""
+    return [search_token(word) for word in SEARCH_TOKEN_PATTERN.findall(text.lower())
+            if word not in SEARCH_STOPWORDS]
+
+def plain_text(text):
+    """Markdown with its formatting characters removed, for indexing and snippets"""
+    return ' '.join(re.sub(r'[#*_`>|]+|-{3,}', ' ', text).split())
+
+def search_documents(parser):
+    """Documents for the search index: topic chunks, Key Essentials sections, quiz questions and flashcards"""
+    documents = []
+    for topic_key, topic in parser.topics.items():
+        if not topic:
+            continue
+        for s, section in enumerate(topic.get('sections', [])):
+            for c, chunk in enumerate(section.get('chunks', [])):
+                documents.append(SearchDocument(
+                    'topic', ('topic', topic['number'], s, c),
+                    f"Topic {topic['number']}: {section.get('title', '')}", plain_text(chunk['content']),
+                    'study_topic', (('topic_num', topic['number']),), f'chunk-{s}-{c}'))
+
+    for i, section in enumerate(parser.key_essentials.get('sections', [])):
+        documents.append(SearchDocument(
+            'essentials', ('essentials', i), section.get('title', ''), plain_text(section.get('content', '')),
+            'review', (), f'section-{i}'))
+
+    answers = parser.practice_quiz.get('answers', {})
+    for question in parser.practice_quiz.get('questions', ()):
+        options = ' '.join(f'{option.letter}) {option.text}' for option in question.options)
+        explanation = answers.get(question.number, {}).get('explanation', '')
+        documents.append(SearchDocument(
+            'quiz', ('quiz', question.number), f'Question {question.number}',
+            plain_text(f'{question.question} {options} {explanation}'),
+            'quiz', (('quiz_type', f'topic_{question.topic}'),), None))
+
+    for card in parser.flashcards:
+        # Terms merged into the card stay searchable through its text
+        aliases = card.get('aliases')
+        text = f"Also called {', '.join(aliases)}. {card['definition']}" if aliases else card['definition']
+        documents.append(SearchDocument(
+            'flashcard', ('flashcard', card['id']), card['term'], plain_text(text),
+            'flashcards', (('category', card.get('category', 'unknown')),), None))
+    return documents
+
+class SearchIndex:
+    """Inverted index over study content with BM25 weights computed at build time.
+
+    Each term's postings are an array of document ids and an array of their
+    BM25 term weights, so a query only sums the postings of its own terms
+    and never touches text that doesn't match.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.kinds = np.array([doc.kind for doc in documents])
+        term_counts = []
+        for doc in documents:
+            # Titles count twice so a match there outranks one in passing
+            term_counts.append(Counter(search_tokens(f'{doc.title} {doc.title} {doc.text}')))
+
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+        average_length = lengths.mean() if len(lengths) else 1.0
+        postings = {}
+        for doc_id, counts in enumerate(term_counts):
+            for term, count in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc_id)
+                postings[term][1].append(count)
+
+        num_docs = len(documents)
+        self.postings = {}
+        for term, (doc_ids, counts) in postings.items():
+            doc_ids = np.array(doc_ids, dtype=np.int32)
+            tf = np.array(counts, dtype=np.float32)
+            idf = np.log(1 + (num_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_ids] / average_length)
+            self.postings[term] = (doc_ids, (idf * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32))
+
+    def search(self, query, limit=10, kinds=None):
+        """Top (document, score) matches for a query, best first"""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(search_tokens(query)):
+            if term in self.postings:
+                doc_ids, weights = self.postings[term]
+                scores[doc_ids] += weights
+        if kinds:
+            scores[~np.isin(self.kinds, list(kinds))] = 0
+        matches = np.flatnonzero(scores)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        matches = matches[np.argsort(-scores[matches], kind='stable')]
+        return [(self.documents[doc_id], float(scores[doc_id])) for doc_id in matches]
+
+    def snippet(self, document, query, width=SNIPPET_CHARS):
+        """Escaped excerpt of a document around its first match, with matches in <mark>"""
+        terms = set(search_tokens(query))
+        text = document.text
+        words = list(re.finditer(r'[A-Za-z0-9]+', text))
+        first = next((m.start() for m in words if search_token(m.group().lower()) in terms), 0)
+        start = max(0, first - width // 3)
+        if start:
+            start = text.find(' ', start) + 1 or start
+        end = min(len(text), start + width)
+        if end < len(text):
+            end = text.rfind(' ', start, end) if text.rfind(' ', start, end) > start else end
+
+        parts = ['…' if start else '']
+        position = start
+        for match in words:
+            if match.start() < start or match.end() > end:
+                continue
+            if search_token(match.group().lower()) in terms:
+                parts.append(str(escape(text[position:match.start()])))
+                parts.append(f'<mark>{escape(match.group())}</mark>')
+                position = match.end()
+        parts.append(str(escape(text[position:end])))
+        parts.append('…' if end < len(text) else '')
+        return Markup(''.join(parts))
+
+# Related content
+RELATED_KINDS = ('topic', 'quiz', 'flashcard')
+RELATED_PER_KIND = 3
+RELATED_MIN_SIMILARITY = 0.1
+RELATED_MAX_FEATURES = 4096
+RELATED_BLOCK_ROWS = 512
+
+class RelatedContent:
+    """Nearest topic chunks, quiz questions and flashcards for every item.
+
+    Items are TF-IDF vectors over terms that occur in at least two of them
+    (at most RELATED_MAX_FEATURES). Cosine similarities are computed a block
+    of rows at a time with one matrix product, and only the top
+    RELATED_PER_KIND neighbors of each kind are kept, so requests just look
+    the table up. Chunks in the same topic are not suggested for each other.
+    """
+
+    def __init__(self, documents):
+        self.documents = [doc for doc in documents if doc.kind in RELATED_KINDS]
+        self.rows = {doc.key: row for row, doc in enumerate(self.documents)}
+        count = len(self.documents)
+        self.neighbors = np.full((count, len(RELATED_KINDS), RELATED_PER_KIND), -1, dtype=np.int32)
+        if not count:
+            return
+
+        vectors = self.tfidf_vectors()
+        kinds = np.array([RELATED_KINDS.index(doc.kind) for doc in self.documents])
+        topics = np.array([doc.key[1] if doc.kind == 'topic' else -1 for doc in self.documents])
+        columns = [np.flatnonzero(kinds == k) for k in range(len(RELATED_KINDS))]
+
+        for start in range(0, count, RELATED_BLOCK_ROWS):
+            stop = min(start + RELATED_BLOCK_ROWS, count)
+            similarity = vectors[start:stop] @ vectors.T
+            similarity[np.arange(stop - start), np.arange(start, stop)] = 0
+            block_topics = topics[start:stop, None]
+            similarity[(block_topics >= 0) & (block_topics == topics[None, :])] = 0
+
+            for k, cols in enumerate(columns):
+                if not len(cols):
+                    continue
+                scores = similarity[:, cols]
+                take = min(RELATED_PER_KIND, len(cols))
+                top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1, kind='stable')
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+                self.neighbors[start:stop, k, :take] = np.where(
+                    top_scores >= RELATED_MIN_SIMILARITY, cols[top], -1)
+
+    def tfidf_vectors(self):
+        """L2-normalized TF-IDF matrix, one row per item"""
+        token_counts = [Counter(search_tokens(f'{doc.title} {doc.text}')) for doc in self.documents]
+        document_frequency = Counter()
+        for counts in token_counts:
+            document_frequency.update(counts.keys())
+        terms = [term for term, df in document_frequency.most_common() if df >= 2][:RELATED_MAX_FEATURES]
+        column = {term: i for i, term in enumerate(terms)}
+
+        rows, cols, values = [], [], []
+        for row, counts in enumerate(token_counts):
+            for term, n in counts.items():
+                if term in column:
+                    rows.append(row)
+                    cols.append(column[term])
+                    values.append(n)
+
+        count = len(self.documents)
+        vectors = np.zeros((count, len(terms)), dtype=np.float32)
+        vectors[rows, cols] = 1 + np.log(np.array(values, dtype=np.float32))
+        df = np.array([document_frequency[term] for term in terms], dtype=np.float32)
+        vectors *= np.log((1 + count) / (1 + df)) + 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def related(self, key, kinds=RELATED_KINDS):
+        """Related documents of the given kinds for an item key, best first"""
+        row = self.rows.get(key)
+        if row is None:
+            return []
+        return [self.documents[neighbor]
+                for kind in kinds
+                for neighbor in self.neighbors[row, RELATED_KINDS.index(kind)]
+                if neighbor >= 0]
+
+# Type-ahead suggestions
+SuggestEntry = namedtuple('SuggestEntry', ['text', 'kind', 'weight', 'endpoint', 'params', 'anchor'])
+SUGGEST_LIMIT = 10
+SUGGEST_TABLE_CHARS = 3  # prefixes up to this length have precomputed completions
+SUGGEST_WORD_STARTS = 6  # completions also match from each of an entry's first words
+SECTION_NUMBER_PATTERN = re.compile(r'^[\d.]+\s+')
+
+def suggest_normalize(text):
+    """Lowercase text with punctuation collapsed to single spaces"""
+    return ' '.join(SEARCH_TOKEN_PATTERN.findall(text.lower()))
+
+def suggest_entries(parser):
+    """Suggestion entries from services, section titles and flashcard terms, highest weight first"""
+    entries = []
+    for group in SERVICE_COMPARISONS.values():
+        for service in group['services']:
+            entries.append(SuggestEntry(service['name'], 'service', 4, 'service_comparison', (), None))
+    for technique in ML_TECHNIQUES:
+        entries.append(SuggestEntry(technique['name'], 'technique', 4, 'service_comparison', (), None))
+
+    for i, section in enumerate(parser.key_essentials.get('sections', [])):
+        entries.append(SuggestEntry(plain_text(section.get('title', '')), 'essentials', 3, 'review', (), f'section-{i}'))
+
+    for card in parser.flashcards:
+        for term in [card['term']] + card.get('aliases', []):
+            entries.append(SuggestEntry(plain_text(term), 'flashcard', 2, 'flashcards',
+                                        (('category', card.get('category', 'unknown')),), None))
+
+    for topic in parser.topics.values():
+        if not topic:
+            continue
+        for section in topic.get('sections', []):
+            title = SECTION_NUMBER_PATTERN.sub('', plain_text(section.get('title', '')))
+            entries.append(SuggestEntry(title, 'topic', 1, 'study_topic', (('topic_num', topic['number']),), None))
+
+    # One entry per distinct text, keeping the highest weight
+    seen = set()
+    unique = []
+    for entry in entries:
+        key = suggest_normalize(entry.text)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(entry)
+    return unique
+
+class SuggestIndex:
+    """Prefix completions over short titles, backed by a sorted key array.
+
+    Each entry is keyed from each of its first few word starts, so "vision"
+    completes "Azure AI Vision". Prefixes of up to SUGGEST_TABLE_CHARS
+    characters match the most keys, so their top completions are
+    precomputed; longer prefixes bisect the sorted keys to a narrow range
+    and rank just that.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        pairs = sorted(
+            (' '.join(words[start:]), entry_id)
+            for entry_id, words in enumerate(suggest_normalize(entry.text).split() for entry in entries)
+            for start in range(min(len(words), SUGGEST_WORD_STARTS)))
+        self.keys = [key for key, _ in pairs]
+        self.entry_ids = [entry_id for _, entry_id in pairs]
+
+        table = {}
+        for key, entry_id in pairs:
+            for length in range(1, min(len(key), SUGGEST_TABLE_CHARS) + 1):
+                table.setdefault(key[:length], set()).add(entry_id)
+        self.table = {prefix: tuple(sorted(ids, key=self.rank)[:SUGGEST_LIMIT]) for prefix, ids in table.items()}
+
+    def rank(self, entry_id):
+        """Sort key: heavier entries first, then shorter, then alphabetical"""
+        entry = self.entries[entry_id]
+        return (-entry.weight, len(entry.text), entry.text)
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        """Top entries completing the query, best first"""
+        prefix = suggest_normalize(query)
+        if query[-1:].isspace() and prefix:
+            prefix += ' '
+        if not prefix:
+            return []
+        if len(prefix) <= SUGGEST_TABLE_CHARS:
+            ids = self.table.get(prefix, ())[:limit]
+        else:
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+            ids = heapq.nsmallest(limit, set(self.entry_ids[start:end]), key=self.rank)
+        return [self.entries[entry_id] for entry_id in ids]
+
+@functools.lru_cache(maxsize=4096)
+def content_url(endpoint, params, anchor):
+    """URL for a search, suggestion or related-content target, cached since targets are fixed"""
+    url = url_for(endpoint, **dict(params))
+    return f'{url}#{anchor}' if anchor else url
+
+def flashcard_deck_version(flashcards):
+    """Short hash of each card's id, category and difficulty"""
+    cards = [(card['id'], card.get('category', 'unknown'), card.get('difficulty')) for card in flashcards]
+    return hashlib.sha256(repr(cards).encode('utf-8')).hexdigest()[:12]
+
+def build_flashcard_buckets(flashcards):
+    """Group card ids by category, then difficulty, keeping deck order"""
+    buckets = {}
+    for card in flashcards:
+        by_difficulty = buckets.setdefault(card.get('category', 'unknown'), {})
+        by_difficulty.setdefault(card.get('difficulty'), []).append(card['id'])
+    return {category: {difficulty: tuple(ids) for difficulty, ids in by_difficulty.items()}
+            for category, by_difficulty in buckets.items()}
+
+def build_flashcard_filters(buckets):
+    """Matching card ids for every (category, difficulty) filter, 'all' included.
+
+    Each filter's ids are a NumPy array in deck order, so paging can mask
+    them against a user's bitsets without a Python loop.
+    """
+    filters = {}
+    for category, by_difficulty in buckets.items():
+        for difficulty, ids in by_difficulty.items():
+            for key in ((category, difficulty), (category, 'all'), ('all', difficulty), ('all', 'all')):
+                filters.setdefault(key, []).extend(ids)
+    return {key: np.array(ids, dtype=np.int64) for key, ids in filters.items()}
+
+def compute_content_hash():
+    """Hash the study markdown files, card id registry and artifact format to key the compiled artifact
+
+    The registry is part of the key because card ids are baked into the
+    artifact; a build against a different registry must not be loaded here.
+    """
+    digest = hashlib.sha256(f'format-{ARTIFACT_FORMAT_VERSION}'.encode('utf-8'))
+    if FLASHCARD_IDS_FILE and os.path.exists(FLASHCARD_IDS_FILE):
+        digest.update(b'flashcard-ids')
+        with open(FLASHCARD_IDS_FILE, 'rb') as f:
+            digest.update(f.read())
+    for filename in sorted(os.listdir(STUDY_FILES_DIR)):
+        if not filename.endswith('.md'):
+            continue
+        digest.update(filename.encode('utf-8'))
+        with open(os.path.join(STUDY_FILES_DIR, filename), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def artifact_path(content_hash):
+    """Location of the compiled artifact for a given content hash"""
+    return os.path.join(ARTIFACT_DIR, f'study_content_{content_hash}.pkl')
+
+def validate_study_data(data):
+    """Check parsed content for problems, returning a list of error messages"""
+    problems = []
+
+    for i in range(1, 6):
+        topic = data['topics'].get(f'topic_{i}')
+        if not topic or not topic.get('sections'):
+            problems.append(f'Topic {i} has no sections')
+
+    if not data['key_essentials'].get('sections'):
+        problems.append('Key Essentials has no sections')
+
+    quiz_data = data['practice_quiz']
+    answers = quiz_data.get('answers', {})
+    if not quiz_data.get('questions'):
+        problems.append('Practice quiz has no questions')
+    for question in quiz_data.get('questions', ()):
+        letters = [option.letter for option in question.options]
+        if len(letters) < 2:
+            problems.append(f"Question {question.number} has fewer than 2 options")
+        if question.number not in answers:
+            problems.append(f"Question {question.number} has no answer")
+        elif answers[question.number]['correct'] not in letters:
+            problems.append(f"Question {question.number} answer is not one of its options")
+
+    if not data['flashcards']:
+        problems.append('No flashcards were generated')
+
+    return problems
+
+def build_content_artifact():
+    """Parse and validate study-files, then write the compiled content artifact.
+
+    Returns the artifact path. Raises ValueError if the content fails validation.
+    """
+    parser = StudyContentParser()
+    if not parser.parse_all_content():
+        raise ValueError('Failed to parse study content')
+
+    data = build_study_data(parser)
+    problems = validate_study_data(data)
+    if problems:
+        raise ValueError('Study content failed validation:\n  - ' + '\n  - '.join(problems))
+
+    content_hash = compute_content_hash()
+    path = artifact_path(content_hash)
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+
+    # Write to a temp file and rename so readers never see a partial artifact
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'content_hash': content_hash,
+            'built': datetime.now().isoformat(),
+            'study_data': data
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    # Remove artifacts built from older content
+    for filename in os.listdir(ARTIFACT_DIR):
+        stale = os.path.join(ARTIFACT_DIR, filename)
+        if filename.startswith('study_content_') and stale != path:
+            os.remove(stale)
+
+    return path
+
+def load_content_artifact():
+    """Load study_data from the compiled artifact matching the current content.
+
+    Loading it skips markdown parsing and index building. Unpickling builds
+    ordinary Python objects, so for worker processes to share one copy it has
+    to happen once in the parent before they fork (see init_study_data()).
+    Returns None if no up-to-date artifact exists.
+    """
+    try:
+        content_hash = compute_content_hash()
+        path = artifact_path(content_hash)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+
+        if (payload.get('format_version') != ARTIFACT_FORMAT_VERSION or
+                payload.get('content_hash') != content_hash):
+            return None
+        return payload['study_data']
+    except Exception as e:
+        print(f"Error loading content artifact: {e}")
+        return None
+
+def read_submissions(path):
+    """Yield (submission id, answers dict) pairs from a .jsonl or .csv file.
+
+    JSONL lines look like {"id": ..., "answers": {"1": "B", ...}}. CSV files
+    have an optional "id" column plus one column per question, headed with
+    the question number ("1" or "q1"); blank cells are unanswered.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            for row_num, row in enumerate(csv.DictReader(f), 1):
+                answers = {}
+                for column, value in row.items():
+                    number = (column or '').strip().lower().lstrip('q')
+                    if number.isdigit() and value and value.strip():
+                        answers[int(number)] = value
+                yield row.get('id') or row_num, answers
+        else:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield record.get('id', line_num), record.get('answers', {})
+
+def grade_submissions_file(path, output, batch_size=10000):
+    """Grade a submissions file in batches, writing one CSV row per submission.
+
+    Returns the number of submissions graded.
+    """
+    if not study_data:
+        init_study_data()
+    answer_key = study_data['answer_key']
+
+    writer = csv.writer(output)
+    header = ['id', 'score', 'answered', 'percentage']
+    for topic in answer_key.topic_ids:
+        header += [f'topic_{topic}_correct', f'topic_{topic}_total']
+    writer.writerow(header)
+
+    graded_count = 0
+    batch = []
+
+    def flush():
+        ids = [submission_id for submission_id, _ in batch]
+        graded = answer_key.grade([answers for _, answers in batch])
+        answered = graded['answered_count']
+        percentage = np.round(np.divide(graded['score'] * 100.0, answered,
+                                        out=np.zeros(len(batch)), where=answered > 0), 1)
+        topic_pairs = np.stack([graded['topic_correct'], graded['topic_total']], axis=2).reshape(len(batch), -1)
+        for i, submission_id in enumerate(ids):
+            writer.writerow([submission_id, int(graded['score'][i]), int(answered[i]), float(percentage[i])]
+                            + topic_pairs[i].tolist())
+        batch.clear()
+
+    for submission in read_submissions(path):
+        batch.append(submission)
+        graded_count += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return graded_count
+
+class ContentService:
+    """Owns the live study_data snapshot and hot-reloads changed study files.
+
+    Each source file is fingerprinted by mtime and content hash. When a file
+    changes only that source is re-parsed (flashcards are regenerated when a
+    topic or Key Essentials changes) on a copy of the parser, and the global
+    study_data is swapped in a single assignment so in-flight requests keep
+    the snapshot they started with.
+    """
+
+    # Sources whose content feeds flashcard generation
+    FLASHCARD_SOURCES = ('key_essentials',) + tuple(f'topic_{i}' for i in range(1, 6))
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.fingerprints = {}
+        self.lock = threading.Lock()
+        self.watcher = None
+
+    def stat_mtime(self, path):
+        """Return a file's mtime in nanoseconds, or None if it is missing"""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def fingerprint(self, path):
+        """Return (mtime, sha256) for a source file, or None if it is missing"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with open(path, 'rb') as f:
+                return mtime, hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def load(self):
+        """Load all content from the compiled artifact or by parsing, then publish it"""
+        global study_data
+        with self.lock:
+            compiled = load_content_artifact()
+            if compiled is not None:
+                self.parser.outline = compiled['outline']
+                self.parser.topics = compiled['topics']
+                self.parser.key_essentials = compiled['key_essentials']
+                self.parser.practice_quiz = compiled['practice_quiz']
+                self.parser.flashcards = compiled['flashcards']
+                study_data = compiled
+                print(f"✅ Loaded {len(study_data['flashcards'])} flashcards from compiled content")
+            elif self.parser.parse_all_content():
+                study_data = build_study_data(self.parser)
+                print(f"✅ Generated {len(study_data['flashcards'])} flashcards")
+            else:
+                print("Failed to parse study content")
+                return False
+
+            self.fingerprints = {
+                key: self.fingerprint(path)
+                for key, path in self.parser.content_sources().items()
+            }
+            return True
+
+    def reload_changed(self):
+        """Re-parse any study files that changed and swap in a new snapshot.
+
+        Returns the list of content keys that were reloaded.
+        """
+        global study_data
+        with self.lock:
+            changed = []
+            fingerprints = dict(self.fingerprints)
+            for key, path in self.parser.content_sources().items():
+                previous = fingerprints.get(key)
+                current_mtime = self.stat_mtime(path)
+                if previous and current_mtime == previous[0]:
+                    continue
+                current = self.fingerprint(path)
+                fingerprints[key] = current
+                if current and (not previous or current[1] != previous[1]):
+                    changed.append(key)
+
+            if not changed:
+                self.fingerprints = fingerprints
+                return []
+
+            # Parse into a copy so the published snapshot is never mutated
+            parser = copy.copy(self.parser)
+            parser.topics = dict(self.parser.topics)
+            reloaded = [key for key in changed if parser.parse_source(key)]
+
+            if any(key in self.FLASHCARD_SOURCES for key in reloaded):
+                parser.flashcards = parser.generate_flashcards()
+
+            # Failed parses keep their old fingerprint so they are retried
+            for key in changed:
+                if key not in reloaded:
+                    fingerprints[key] = self.fingerprints.get(key)
+
+            self.parser = parser
+            self.fingerprints = fingerprints
+            if reloaded:
+                study_data = build_study_data(parser)
+            return reloaded
+
+    def watch(self, interval=2.0):
+        """Poll study-files in a daemon thread and hot-reload changes"""
+        if self.watcher and self.watcher.is_alive():
+            return self.watcher
+
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    reloaded = self.reload_changed()
+                    if reloaded:
+                        print(f"🔄 Reloaded study content: {', '.join(reloaded)}")
+                except Exception as e:
+                    print(f"Error reloading study content: {e}")
+
+        self.watcher = threading.Thread(target=poll, name='content-watcher', daemon=True)
+        self.watcher.start()
+        return self.watcher
+
+content_service = ContentService(content_parser)
+
+def init_study_data():
+    """Initialize study data on app startup.
+
+    The loaded content is then frozen out of the garbage collector, so worker
+    processes forked after this (gunicorn --preload, see wsgi.py) keep
+    sharing its pages with the parent instead of copying them the first time
+    a collection walks every object.
+    """
+    content_service.load()
+    gc.freeze()
+
+def current_study_data():
+    """Return the study_data snapshot pinned to the current request.
+
+    The first call in a request pins the live snapshot on flask.g so a hot
+    reload mid-request can't mix old and new content.
+    """
+    if has_request_context():
+        if 'study_data' not in g:
+            g.study_data = study_data
+        return g.study_data
+    return study_data
+
+# Quiz attempt aggregates
+QUIZ_TARGET_PERCENT = 80
+QUIZ_ROLLING_ATTEMPTS = 5
+QUIZ_HISTORY_ROWS = 20
+
+def empty_quiz_stats():
+    """Zeroed quiz aggregates for a user who hasn't taken a quiz"""
+    return {
+        'attempts': 0,
+        'correct': 0,
+        'answered': 0,
+        'topics': {},  # Topic number -> correct/total over all attempts
+        'recent': [],  # Percentages of the last QUIZ_ROLLING_ATTEMPTS attempts, oldest first
+        'quiz_types': 0,  # Quiz types attempted at least once
+        'below_target': 0  # Quiz types whose latest percentage is under QUIZ_TARGET_PERCENT
+    }
+
+def default_progress():
+    """Fresh progress record for a new user, one entry per stored field"""
+    return {
+        'topics_completed': [],
+        'topics_started': [],  # Track which topics have been started
+        'current_topic': 1,
+        'current_section': 0,
+        'current_chunk': 0,
+        'quiz_scores': {},  # Quiz type -> latest attempt
+        'quiz_stats': empty_quiz_stats(),  # Aggregates over every attempt, see record_quiz_attempt
+        'study_streak': 0,
+        'cohort': None,  # {'id': cohort code, 'name': display name} once the user joins one
+        'last_study_date': None,
+        'last_quiz_date': None,
+        'study_notes': {},  # User's personal study notes
+        'bookmarks': [],  # Bookmarked sections
+        'flashcard_progress': {
+            'cards_studied': '',  # CardBitset of card IDs studied
+            'cards_mastered': '',  # CardBitset of card IDs mastered
+            'review_queue': '',  # CardBitset of cards due for review
+            'last_flashcard_date': None,
+            'counters': {},  # Category -> difficulty -> studied/mastered counts
+            'counters_deck': None,  # Deck version the counters were built against
+            'due_summary': None,  # Scheduled/due counts, see due_summary()
+            'stats': {
+                'total_studied': 0,
+                'total_mastered': 0,
+                'study_time': 0,  # in minutes
+                'current_streak': 0
+            }
+        },
+        'flashcard_schedule': {},  # Card ID -> ReviewSchedule state
+        'flashcard_activity': {
+            'daily': {},  # ISO date -> rollup, last ACTIVITY_DAYS days only
+            'categories': {},  # Card category -> rollup
+            'recent': []  # Last RECENT_EVENTS raw responses, oldest first
+        }
+    }
+
+PROGRESS_FIELDS = tuple(default_progress())
+
+class CardBitset:
+    """Set of flashcard ids stored as a bitmap, one bit per card id.
+
+    Membership, add and discard are O(1); the size is a popcount over the
+    bytes. Stored as base64 so a deck of thousands of cards costs a few
+    hundred bytes per set.
+    """
+    __slots__ = ('bits',)
+
+    def __init__(self, bits=b''):
+        self.bits = bytearray(bits)
+
+    @classmethod
+    def from_value(cls, value):
+        """Build from a stored base64 string or a legacy list of card ids"""
+        if isinstance(value, str):
+            return cls(base64.b64decode(value))
+        bitset = cls()
+        for card_id in value or []:
+            bitset.add(card_id)
+        return bitset
+
+    def encode(self):
+        """Compact base64 form for storage"""
+        return base64.b64encode(bytes(self.bits).rstrip(b'\x00')).decode('ascii')
+
+    def add(self, card_id):
+        """Set a card's bit, returning True if it wasn't already set"""
+        byte, mask = divmod(card_id, 8)
+        mask = 1 << mask
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        elif self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        return True
+
+    def discard(self, card_id):
+        """Clear a card's bit, returning True if it was set"""
+        if card_id not in self:
+            return False
+        self.bits[card_id // 8] &= ~(1 << (card_id % 8)) & 0xFF
+        return True
+
+    def __contains__(self, card_id):
+        byte = card_id // 8
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (card_id % 8)))
+
+    def __len__(self):
+        return bin(int.from_bytes(self.bits, 'little')).count('1')
+
+    def __iter__(self):
+        for byte, value in enumerate(self.bits):
+            while value:
+                low = value & -value
+                yield byte * 8 + low.bit_length() - 1
+                value ^= low
+
+# Flashcard progress sets kept as bitsets
+FLASHCARD_BITSETS = ('cards_studied', 'cards_mastered', 'review_queue')
+
+# Spaced-repetition parameters (SM-2 intervals, Anki-style lapses)
+DEFAULT_EASE = 2500  # ease factor in thousandths
+MIN_EASE = 1300
+LAPSE_EASE_PENALTY = 200
+RELEARN_SECONDS = 10 * 60
+DAY_SECONDS = 24 * 60 * 60
+
+class ReviewSchedule:
+    """SM-2 spaced-repetition state for one user's flashcards.
+
+    Each card's state is a compact [due, interval, ease, reps, lapses] list
+    (due in epoch seconds, interval in days, ease in thousandths). Due
+    cards are paged by (due, card_id) key with one vectorized pass over the
+    due times, so a page costs the same wherever it falls in the queue and
+    only the cards that can be on it get sorted.
+    """
+    __slots__ = ('cards',)
+
+    def __init__(self, cards=None):
+        self.cards = cards or {}
+
+    @classmethod
+    def from_value(cls, value):
+        """Build from the stored {card_id: state} mapping"""
+        return cls({int(card_id): list(state) for card_id, state in (value or {}).items()})
+
+    def encode(self):
+        """Plain dict form for storage"""
+        return {str(card_id): state for card_id, state in self.cards.items()}
+
+    def review(self, card_id, correct, when):
+        """Reschedule a card after a correct or incorrect answer at `when`"""
+        now = int(when.timestamp())
+        due, interval, ease, reps, lapses = self.cards.get(card_id, (now, 0, DEFAULT_EASE, 0, 0))
+        if correct:
+            reps += 1
+            if reps == 1:
+                interval = 1
+            elif reps == 2:
+                interval = 6
+            else:
+                interval = max(interval + 1, round(interval * ease / 1000))
+            due = now + interval * DAY_SECONDS
+        else:
+            if reps:
+                lapses += 1
+            reps, interval = 0, 0
+            ease = max(MIN_EASE, ease - LAPSE_EASE_PENALTY)
+            due = now + RELEARN_SECONDS
+        self.cards[card_id] = [due, interval, ease, reps, lapses]
+
+    def add_due(self, card_ids, when):
+        """Schedule untracked cards (e.g. a legacy review queue) as due at `when`"""
+        now = int(when.timestamp())
+        for card_id in card_ids:
+            if card_id not in self.cards:
+                self.cards[card_id] = [now, 0, DEFAULT_EASE, 0, 0]
+
+    def due_page(self, when, after=None, limit=None, card_ids=None):
+        """Cards due by `when` after the `after` (due, card_id) key, soonest first.
+
+        Returns (page, remaining): up to limit (due, card_id) pairs and how
+        many due cards follow the key in all. card_ids, an array of ids,
+        restricts the cards considered (e.g. to a category).
+        """
+        if not self.cards:
+            return [], 0
+        ids = np.fromiter(self.cards, dtype=np.int64, count=len(self.cards))
+        due = np.fromiter((state[0] for state in self.cards.values()), dtype=np.int64, count=len(self.cards))
+        matches = due <= int(when.timestamp())
+        if after is not None:
+            matches &= (due > after[0]) | ((due == after[0]) & (ids > after[1]))
+        if card_ids is not None:
+            matches &= np.isin(ids, card_ids)
+        ids, due = ids[matches], due[matches]
+        remaining = len(ids)
+        if limit is not None and limit < remaining:
+            # Only cards due no later than the limit-th soonest can be on the page
+            cutoff = np.partition(due, limit - 1)[limit - 1]
+            ids, due = ids[due <= cutoff], due[due <= cutoff]
+        order = np.lexsort((ids, due))[:limit]
+        return [(int(due[i]), int(ids[i])) for i in order], remaining
+
+    def due(self, when, limit=None):
+        """Ids of cards due by `when`, soonest first"""
+        return [card_id for _, card_id in self.due_page(when, limit=limit)[0]]
+
+    def __len__(self):
+        return len(self.cards)
+
+# Not-yet-due times kept in a due summary, so its due count can roll forward
+# this many times before the schedule has to be read again
+DUE_SUMMARY_UPCOMING = 64
+
+def due_summary(schedule, when):
+    """Scheduled and due card counts at `when`, plus the soonest upcoming due times.
+
+    Stored with the flashcard progress so the stats don't need the schedule:
+    roll_due_summary() moves it forward in time and reschedule_due_summary()
+    applies each review to it.
+    """
+    now = int(when.timestamp())
+    upcoming = [state[0] for state in schedule.cards.values() if state[0] > now]
+    return {
+        'scheduled': len(schedule),
+        'due': len(schedule) - len(upcoming),
+        'as_of': now,
+        'upcoming': heapq.nsmallest(DUE_SUMMARY_UPCOMING, upcoming)
+    }
+
+def roll_due_summary(summary, when):
+    """Move a due summary forward to `when`, counting upcoming cards that came due.
+
+    Returns False if the summary can't answer for `when` (missing, newer
+    than `when`, or out of upcoming times while cards are still pending), in
+    which case it has to be rebuilt from the schedule.
+    """
+    now = int(when.timestamp())
+    if not summary or now < summary['as_of']:
+        return False
+    upcoming = summary['upcoming']
+    crossed = bisect.bisect_right(upcoming, now)
+    if crossed == len(upcoming) and summary['due'] + crossed < summary['scheduled']:
+        return False
+    summary['due'] += crossed
+    del upcoming[:crossed]
+    summary['as_of'] = now
+    return True
+
+def reschedule_due_summary(summary, old_due, new_due):
+    """Apply one card moving from old_due (None if it was unscheduled) to new_due"""
+    now = summary['as_of']
+    upcoming = summary['upcoming']
+    # Whether upcoming holds every pending card, not just the soonest ones
+    complete = len(upcoming) == summary['scheduled'] - summary['due']
+    if old_due is None:
+        summary['scheduled'] += 1
+    elif old_due <= now:
+        summary['due'] -= 1
+    else:
+        index = bisect.bisect_left(upcoming, old_due)
+        if index < len(upcoming) and upcoming[index] == old_due:
+            del upcoming[index]
+    if new_due <= now:
+        summary['due'] += 1
+    elif complete or (upcoming and new_due < upcoming[-1]):
+        bisect.insort(upcoming, new_due)
+        del upcoming[DUE_SUMMARY_UPCOMING:]
+
+class ProgressStore:
+    """Per-user progress storage, read and written one field at a time"""
+
+    def get(self, user_id, fields):
+        """Return {field: value} for whichever of fields are stored"""
+        raise NotImplementedError
+
+    def set(self, user_id, values):
+        """Store each {field: value} pair, replacing previous values"""
+        raise NotImplementedError
+
+    def append_attempt(self, user_id, attempt):
+        """Add a quiz attempt to the user's attempt history"""
+        raise NotImplementedError
+
+    def recent_attempts(self, user_id, limit):
+        """Up to limit of the user's latest quiz attempts, newest first"""
+        raise NotImplementedError
+
+class SessionProgressStore(ProgressStore):
+    """Keeps progress in Flask's signed cookie session"""
+
+    def get(self, user_id, fields):
+        progress = session.get('progress', {})
+        return {field: progress[field] for field in fields if field in progress}
+
+    def set(self, user_id, values):
+        progress = session.get('progress', {})
+        progress.update(values)
+        session['progress'] = progress
+
+    def append_attempt(self, user_id, attempt):
+        # The cookie can't hold an unbounded log, so only the latest attempts are kept
+        session['quiz_attempts'] = (session.get('quiz_attempts', []) + [attempt])[-QUIZ_HISTORY_ROWS:]
+
+    def recent_attempts(self, user_id, limit):
+        return session.get('quiz_attempts', [])[::-1][:limit]
+
+class SQLiteProgressStore(ProgressStore):
+    """Keeps progress server-side in SQLite, one JSON value per (user, field).
+
+    Quiz attempts go to an append-only table indexed by (user, id), so reading
+    the latest few costs the same however many a user has taken.
+
+    The database runs in WAL mode so readers don't block the writer, and
+    each thread lazily opens its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress (
+                    user_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated TEXT NOT NULL,
+                    PRIMARY KEY (user_id, field)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS quiz_attempts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    taken TEXT NOT NULL,
+                    attempt TEXT NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS quiz_attempts_user ON quiz_attempts (user_id, id)')
+            self.local.connection = conn
+        return conn
+
+    def get(self, user_id, fields):
+        fields = list(fields)
+        if not fields:
+            return {}
+        placeholders = ','.join('?' * len(fields))
+        rows = self.connection().execute(
+            f'SELECT field, value FROM progress WHERE user_id = ? AND field IN ({placeholders})',
+            [user_id] + fields
+        )
+        return {field: json.loads(value) for field, value in rows}
+
+    def set(self, user_id, values):
+        if not values:
+            return
+        updated = datetime.now().isoformat()
+        conn = self.connection()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO progress (user_id, field, value, updated) VALUES (?, ?, ?, ?)',
+                [(user_id, field, json.dumps(value), updated) for field, value in values.items()]
+            )
+
+    def append_attempt(self, user_id, attempt):
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO quiz_attempts (user_id, taken, attempt) VALUES (?, ?, ?)',
+                (user_id, attempt.get('date') or datetime.now().isoformat(), json.dumps(attempt))
+            )
+
+    def recent_attempts(self, user_id, limit):
+        rows = self.connection().execute(
+            'SELECT attempt FROM quiz_attempts WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+            (user_id, limit)
+        )
+        return [json.loads(attempt) for (attempt,) in rows]
+
+def create_progress_store():
+    """Build the progress backend named by PROGRESS_BACKEND ('sqlite' or 'session')"""
+    backend = os.environ.get('PROGRESS_BACKEND', 'sqlite')
+    if backend == 'session':
+        return SessionProgressStore()
+    if backend == 'sqlite':
+        return SQLiteProgressStore(os.environ.get('PROGRESS_DB', 'data/progress.db'))
+    raise ValueError(f'Unknown PROGRESS_BACKEND: {backend}')
+
+progress_store = create_progress_store()
+
+# Item statistics over every user's quiz responses
+RESPONSES_DB = os.environ.get('RESPONSES_DB', os.path.join('data', 'responses.db'))
+ITEM_STATS_CHUNK_ROWS = 1000000
+ITEM_MIN_RESPONSES = 20  # fewer responses than this are too few to flag an item
+ITEM_TOO_EASY = 0.9  # share answering correctly
+ITEM_TOO_HARD = 0.3
+ITEM_MIN_DISCRIMINATION = 0.1
+# Admin pages (they reveal the answer key) are disabled unless this token is set
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+class ResponseStore:
+    """Server-side log of per-question quiz responses from all users.
+
+    Each answered question is one row holding the chosen letter code and the
+    attempt's score, which is all the item statistics need. The computed
+    statistics are written back to an item_stats table keyed by question
+    number. Like SQLiteProgressStore, each thread opens its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    question INTEGER NOT NULL,
+                    choice INTEGER NOT NULL,
+                    score INTEGER NOT NULL,
+                    answered INTEGER NOT NULL,
+                    recorded INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS item_stats (
+                    question INTEGER PRIMARY KEY,
+                    responses INTEGER NOT NULL,
+                    difficulty REAL,
+                    discrimination REAL,
+                    options TEXT NOT NULL,
+                    computed TEXT NOT NULL
+                )
+            """)
+            self.local.connection = conn
+        return conn
+
+    def record(self, answer_key, graded, row=0):
+        """Log the answered questions of one graded submission"""
+        responses = graded['responses'][row]
+        columns = np.flatnonzero(graded['answered'][row])
+        score = int(graded['score'][row])
+        answered = int(graded['answered_count'][row])
+        recorded = int(time.time())
+        conn = self.connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO responses (question, choice, score, answered, recorded) VALUES (?, ?, ?, ?, ?)',
+                [(int(answer_key.numbers[c]), int(responses[c]), score, answered, recorded) for c in columns]
+            )
+
+    def chunks(self, size=ITEM_STATS_CHUNK_ROWS):
+        """All responses as int64 arrays of (question, choice, score, answered) rows.
+
+        SQLite packs each row into one integer so the driver builds a single
+        Python int per row instead of a tuple, which halves the read time.
+        """
+        cursor = self.connection().execute(
+            'SELECT ((question * 8 + choice + 2) << 32) | (score << 16) | answered FROM responses')
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            packed = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64, count=len(rows))
+            yield np.column_stack([packed >> 35, ((packed >> 32) & 7) - 2, (packed >> 16) & 0xFFFF, packed & 0xFFFF])
+
+    def save_item_stats(self, items):
+        """Replace the stored item statistics with items from item_stats_rows()"""
+        computed = datetime.now().isoformat()
+        conn = self.connection()
+        with conn:
+            conn.execute('DELETE FROM item_stats')
+            conn.executemany(
+                'INSERT INTO item_stats (question, responses, difficulty, discrimination, options, computed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(item['number'], item['responses'], item['difficulty'], item['discrimination'],
+                  json.dumps(item['options']), computed) for item in items]
+            )
+
+    def item_stats(self):
+        """Stored item statistics by question number"""
+        rows = self.connection().execute(
+            'SELECT question, responses, difficulty, discrimination, options, computed FROM item_stats')
+        return {
+            question: {
+                'number': question,
+                'responses': responses,
+                'difficulty': difficulty,
+                'discrimination': discrimination,
+                'options': json.loads(options),
+                'computed': computed
+            }
+            for question, responses, difficulty, discrimination, options, computed in rows
+        }
+
+response_store = ResponseStore(RESPONSES_DB)
+
+# Cohort leaderboards
+COHORTS_DB = os.environ.get('COHORTS_DB', os.path.join('data', 'cohorts.db'))
+COHORT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+COHORT_NAME_CHARS = 40
+COHORT_TOP = 10
+READINESS_BUCKETS = 1001  # readiness in tenths of a percent, 0.0-100.0
+
+class CohortStore:
+    """Cross-user readiness and streak standings per cohort, kept in SQLite.
+
+    Members are indexed by (cohort, readiness, streak) so the top N is an
+    index range read. For rank and percentile each cohort also keeps a
+    Fenwick tree of member counts per readiness bucket (one row per tree
+    node), so counting members above a score reads and updating a member
+    writes about log2(READINESS_BUCKETS) rows however large the cohort is.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS members (
+                    cohort TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    readiness INTEGER NOT NULL,
+                    streak INTEGER NOT NULL,
+                    updated TEXT NOT NULL,
+                    PRIMARY KEY (cohort, user_id)
+                ) WITHOUT ROWID
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS members_rank ON members (cohort, readiness DESC, streak DESC)')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rank_tree (
+                    cohort TEXT NOT NULL,
+                    node INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (cohort, node)
+                ) WITHOUT ROWID
+            """)
+            self.local.connection = conn
+        return conn
+
+    @staticmethod
+    def bucket(readiness):
+        """Fenwick tree position (1-based) for a readiness percentage"""
+        return min(max(int(round(readiness * 10)), 0), READINESS_BUCKETS - 1) + 1
+
+    def add_to_tree(self, conn, cohort, position, delta):
+        nodes = []
+        while position <= READINESS_BUCKETS:
+            nodes.append((cohort, position, delta))
+            position += position & -position
+        conn.executemany(
+            'INSERT INTO rank_tree (cohort, node, count) VALUES (?, ?, ?) '
+            'ON CONFLICT (cohort, node) DO UPDATE SET count = count + excluded.count',
+            nodes
+        )
+
+    def count_through(self, cohort, position):
+        """Members whose bucket is at or below position"""
+        nodes = []
+        while position > 0:
+            nodes.append(position)
+            position -= position & -position
+        if not nodes:
+            return 0
+        placeholders = ','.join('?' * len(nodes))
+        (total,) = self.connection().execute(
+            f'SELECT COALESCE(SUM(count), 0) FROM rank_tree WHERE cohort = ? AND node IN ({placeholders})',
+            [cohort] + nodes
+        ).fetchone()
+        return total
+
+    def update(self, cohort, user_id, name, readiness, streak):
+        """Add a member or move them to their new readiness and streak"""
+        position = self.bucket(readiness)
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT readiness FROM members WHERE cohort = ? AND user_id = ?',
+                               (cohort, user_id)).fetchone()
+            if row is None or row[0] + 1 != position:
+                if row is not None:
+                    self.add_to_tree(conn, cohort, row[0] + 1, -1)
+                self.add_to_tree(conn, cohort, position, 1)
+            conn.execute(
+                'INSERT OR REPLACE INTO members (cohort, user_id, name, readiness, streak, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (cohort, user_id, name, position - 1, streak, datetime.now().isoformat())
+            )
+
+    def remove(self, cohort, user_id):
+        """Take a member out of a cohort"""
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT readiness FROM members WHERE cohort = ? AND user_id = ?',
+                               (cohort, user_id)).fetchone()
+            if row is not None:
+                self.add_to_tree(conn, cohort, row[0] + 1, -1)
+                conn.execute('DELETE FROM members WHERE cohort = ? AND user_id = ?', (cohort, user_id))
+
+    def size(self, cohort):
+        return self.count_through(cohort, READINESS_BUCKETS)
+
+    def standing(self, cohort, user_id):
+        """A member's rank (1 = best, ties share a rank) and percentile, or None"""
+        row = self.connection().execute(
+            'SELECT readiness, streak FROM members WHERE cohort = ? AND user_id = ?', (cohort, user_id)).fetchone()
+        if row is None:
+            return None
+        readiness, streak = row
+        size = self.size(cohort)
+        at_or_below = self.count_through(cohort, readiness + 1)
+        return {
+            'readiness': readiness / 10,
+            'streak': streak,
+            'rank': size - at_or_below + 1,
+            'size': size,
+            'percentile': round((at_or_below - 1) / (size - 1) * 100) if size > 1 else 100
+        }
+
+    def top(self, cohort, limit=COHORT_TOP):
+        """Best members by readiness, then streak"""
+        rows = self.connection().execute(
+            'SELECT user_id, name, readiness, streak FROM members WHERE cohort = ? '
+            'ORDER BY readiness DESC, streak DESC LIMIT ?', (cohort, limit))
+        return [{'user_id': user_id, 'name': name, 'readiness': readiness / 10, 'streak': streak}
+                for user_id, name, readiness, streak in rows]
+
+    def distribution(self, cohort, bands=10):
+        """Member counts per readiness band (0-10%, 10-20%, ...), from the tree"""
+        edges = [self.count_through(cohort, self.bucket(100 * band / bands) - 1) for band in range(1, bands)]
+        edges = [0] + edges + [self.size(cohort)]
+        return [edges[band + 1] - edges[band] for band in range(bands)]
+
+cohort_store = CohortStore(COHORTS_DB)
+
+def compute_item_stats(answer_key, chunks):
+    """Accumulate per-question response statistics over chunks of response rows.
+
+    Everything is a sum per question (np.bincount over the question's answer
+    key column), so any number of rows is processed a chunk at a time. A
+    response is correct if its choice matches the current key, which lets a
+    fixed key be rechecked against old responses. Discrimination is the
+    point-biserial correlation between answering correctly and the rest of
+    the attempt's score (score without this question, as a fraction of the
+    other questions answered).
+
+    Returns a dict of per-question arrays in answer key column order:
+    'responses', 'difficulty' (share correct), 'discrimination' (NaN where
+    undefined) and 'options' (questions x letters, share choosing each).
+    """
+    questions = len(answer_key.numbers)
+    letters = len(AnswerKey.LETTERS)
+    counts = np.zeros(questions)
+    correct_sum = np.zeros(questions)
+    rest_sum = np.zeros(questions)
+    rest_sq_sum = np.zeros(questions)
+    correct_rest_sum = np.zeros(questions)
+    option_counts = np.zeros(questions * letters)
+
+    for chunk in chunks:
+        number, choice, score, answered = chunk.T
+        column = np.minimum(np.searchsorted(answer_key.numbers, number), questions - 1)
+        keep = (answer_key.numbers[column] == number) & (choice >= 0) & (answered > 1)
+        column, choice, score, answered = column[keep], choice[keep], score[keep], answered[keep]
+
+        correct = (choice == answer_key.correct[column]).astype(np.float64)
+        rest = np.clip(score - correct, 0, None) / (answered - 1)
+
+        counts += np.bincount(column, minlength=questions)
+        correct_sum += np.bincount(column, correct, minlength=questions)
+        rest_sum += np.bincount(column, rest, minlength=questions)
+        rest_sq_sum += np.bincount(column, rest * rest, minlength=questions)
+        correct_rest_sum += np.bincount(column, correct * rest, minlength=questions)
+        option_counts += np.bincount(column * letters + choice, minlength=questions * letters)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difficulty = correct_sum / counts
+        rest_mean = rest_sum / counts
+        covariance = correct_rest_sum / counts - difficulty * rest_mean
+        spread = np.sqrt((rest_sq_sum / counts - rest_mean ** 2) * difficulty * (1 - difficulty))
+        discrimination = np.where(spread > 1e-12, covariance / spread, np.nan)
+        options = option_counts.reshape(questions, letters) / counts[:, None]
+
+    return {
+        'responses': counts.astype(np.int64),
+        'difficulty': difficulty,
+        'discrimination': discrimination,
+        'options': np.nan_to_num(options)
+    }
+
+def item_stats_rows(answer_key, stats):
+    """One dict per answered question from compute_item_stats() arrays, rounded for storage"""
+    items = []
+    for column, number in enumerate(answer_key.numbers):
+        responses = int(stats['responses'][column])
+        if not responses:
+            continue
+        discrimination = stats['discrimination'][column]
+        items.append({
+            'number': int(number),
+            'responses': responses,
+            'difficulty': round(float(stats['difficulty'][column]), 3),
+            'discrimination': None if np.isnan(discrimination) else round(float(discrimination), 3),
+            'options': {letter: round(float(share), 3)
+                        for letter, share in zip(AnswerKey.LETTERS, stats['options'][column])}
+        })
+    return items
+
+def item_flags(item, correct_letter):
+    """Review flags for an item: too easy, too hard or possibly mis-keyed"""
+    if item['responses'] < ITEM_MIN_RESPONSES:
+        return []
+    flags = []
+    if item['difficulty'] >= ITEM_TOO_EASY:
+        flags.append('too easy')
+    elif item['difficulty'] <= ITEM_TOO_HARD:
+        flags.append('too hard')
+    popular = max(item['options'], key=item['options'].get)
+    if popular != correct_letter or (item['discrimination'] is not None and item['discrimination'] < 0):
+        flags.append('check key')
+    elif item['discrimination'] is not None and item['discrimination'] < ITEM_MIN_DISCRIMINATION:
+        flags.append('low discrimination')
+    return flags
+
+def run_item_stats_job(store=None):
+    """Recompute item statistics from every logged response and store them.
+
+    Returns the number of questions with statistics.
+    """
+    if not study_data:
+        init_study_data()
+    store = store or response_store
+    answer_key = study_data['answer_key']
+    items = item_stats_rows(answer_key, compute_item_stats(answer_key, store.chunks()))
+    store.save_item_stats(items)
+    return len(items)
+
+def init_user_session():
+    """Return the visitor's progress user id, or None if they have none yet.
+
+    Ids are only handed out when there is progress to save (see
+    ensure_user_id), so browsing read-only pages never sets a cookie. Progress
+    left in the cookie by older versions is moved into the store here; with
+    the session store it stays put and the visitor just gets an id.
+    """
+    if 'progress' in session:
+        if isinstance(progress_store, SessionProgressStore):
+            return ensure_user_id()
+        legacy = session.pop('progress')
+        progress_store.set(ensure_user_id(), {field: legacy[field] for field in PROGRESS_FIELDS if field in legacy})
+    if 'user_id' in session and not session.permanent:
+        # Ids handed out before cookies were made permanent
+        session.permanent = True
+    return session.get('user_id')
+
+def ensure_user_id():
+    """Return the visitor's user id, assigning one in their session if needed"""
+    if 'user_id' not in session:
+        session['user_id'] = secrets.token_urlsafe(16)
+        session.permanent = True
+    return session['user_id']
+
+class ProgressAccessor:
+    """Request-scoped access to a user's progress with field-level dirty tracking.
+
+    Fields are fetched from the store on first use and snapshotted as JSON.
+    commit() writes back only the fields whose value differs from their
+    snapshot, including lists and dicts changed in place, so a request that
+    changes nothing touches neither the store nor the session cookie.
+    Supports dict-style reads so templates can use it like the old progress dict.
+    """
+
+    def __init__(self, store, user_id):
+        self.store = store
+        self.user_id = user_id
+        self.values = {}
+        self.snapshots = {}
+
+    def load(self, fields):
+        """Fetch any of fields not loaded yet in one store read"""
+        missing = [field for field in fields if field not in self.values]
+        if missing:
+            stored = self.store.get(self.user_id, missing) if self.user_id else {}
+            defaults = default_progress()
+            for field in missing:
+                value = stored[field] if field in stored else defaults[field]
+                self.values[field] = value
+                self.snapshots[field] = json.dumps(value, sort_keys=True)
+        return self
+
+    def __getitem__(self, field):
+        if field not in self.values:
+            if field not in PROGRESS_FIELDS:
+                raise KeyError(field)
+            self.load([field])
+        return self.values[field]
+
+    def __setitem__(self, field, value):
+        if field not in PROGRESS_FIELDS:
+            raise KeyError(field)
+        self.load([field])
+        self.values[field] = value
+
+    def __contains__(self, field):
+        return field in PROGRESS_FIELDS
+
+    def get(self, field, default=None):
+        return self[field] if field in PROGRESS_FIELDS else default
+
+    def dirty_fields(self):
+        """Loaded fields whose value no longer matches what was read"""
+        return [
+            field for field, value in self.values.items()
+            if json.dumps(value, sort_keys=True) != self.snapshots[field]
+        ]
+
+    def commit(self):
+        """Write changed fields to the store, returning their names"""
+        dirty = self.dirty_fields()
+        if dirty:
+            if self.user_id is None:
+                self.user_id = ensure_user_id()
+            self.store.set(self.user_id, {field: self.values[field] for field in dirty})
+            for field in dirty:
+                self.snapshots[field] = json.dumps(self.values[field], sort_keys=True)
+        return dirty
 
-        # Count complex terms
-        complex_terms = ['transformer', 'neural network', 'algorithm', 'architecture', 'embeddings', 'unsupervised', 'supervised']
-        complex_count = sum(1 for term in complex_terms if term in definition)
+def current_progress():
+    """The current request's ProgressAccessor"""
+    if 'progress' not in g:
+        g.progress = ProgressAccessor(progress_store, init_user_session())
+    return g.progress
 
-        # Length-based assessment
-        length = len(definition)
+def load_progress(*fields):
+    """Prefetch progress fields for the current user (all fields if none given).
 
-        if complex_count >= 2 or length > 300:
-            return 'hard'
-        elif complex_count == 1 or length > 150:
-            return 'medium'
-        else:
-            return 'easy'
+    Returns the request's ProgressAccessor; fields never saved read as their
+    defaults, and changes are written back when the request finishes.
+    """
+    return current_progress().load(fields or PROGRESS_FIELDS)
 
-# Initialize content parser
-content_parser = StudyContentParser()
-study_data = {}
+@app.after_request
+def commit_progress(response):
+    """Persist whichever progress fields the request changed"""
+    progress = g.get('progress')
+    if progress is not None:
+        changed = progress.commit()
+        sync_cohort_standing(progress, changed)
+    return response
 
-def init_study_data():
-    """Initialize study data on app startup"""
-    global study_data
-    if content_parser.parse_all_content():
-        study_data = {
-            'outline': content_parser.outline,
-            'topics': content_parser.topics,
-            'key_essentials': content_parser.key_essentials,
-            'practice_quiz': content_parser.practice_quiz,
-            'flashcards': content_parser.flashcards
-        }
-        print(f"✅ Generated {len(study_data['flashcards'])} flashcards")
+# Progress fields that feed a user's cohort standing
+STANDING_FIELDS = frozenset(['topics_completed', 'quiz_stats', 'flashcard_progress', 'study_streak', 'cohort'])
+
+def sync_cohort_standing(progress, changed):
+    """Push a cohort member's readiness and streak to the cohort store if they changed.
+
+    Runs after the user's progress is saved, and a busy or failing cohort
+    database is only logged: the leaderboard catches up on the member's
+    next change.
+    """
+    if not STANDING_FIELDS.intersection(changed):
+        return
+    try:
+        cohort = progress['cohort']
+        if cohort and progress.user_id:
+            readiness = calculate_exam_readiness(progress)
+            cohort_store.update(cohort['id'], progress.user_id, cohort['name'],
+                                readiness['overall'], progress['study_streak'])
+            # Readiness may have migrated legacy quiz scores; keep that too
+            progress.commit()
+    except Exception:
+        app.logger.exception('Error updating cohort standing')
+
+# Flashcard activity retention
+ACTIVITY_DAYS = 90
+RECENT_EVENTS = 50
+
+def empty_rollup():
+    """Zeroed counters for one day or category of flashcard activity"""
+    return {'studied': 0, 'correct': 0, 'incorrect': 0, 'time': 0}
+
+def record_flashcard_activity(activity, category, card_id, response, study_time, when):
+    """Fold one flashcard response into the bounded activity rollups.
+
+    Daily rollups older than ACTIVITY_DAYS are dropped and only the last
+    RECENT_EVENTS raw responses are kept, so storage stays bounded however
+    long someone studies.
+    """
+    day = when.date().isoformat()
+    daily = activity['daily']
+    for rollup in (daily.setdefault(day, empty_rollup()),
+                   activity['categories'].setdefault(category, empty_rollup())):
+        rollup['studied'] += 1
+        rollup[response] += 1
+        rollup['time'] += study_time
+
+    cutoff = (when.date() - timedelta(days=ACTIVITY_DAYS - 1)).isoformat()
+    for old_day in [d for d in daily if d < cutoff]:
+        del daily[old_day]
+
+    activity['recent'].append({
+        'date': when.isoformat(),
+        'card_id': card_id,
+        'response': response,
+        'time_spent': study_time
+    })
+    del activity['recent'][:-RECENT_EVENTS]
+
+def migrate_study_sessions(progress, activity):
+    """Fold the unbounded study_sessions log from older versions into the rollups"""
+    for entry in progress.pop('study_sessions', None) or []:
+        when = datetime.fromisoformat(entry['date'])
+        day = activity['daily'].setdefault(when.date().isoformat(), empty_rollup())
+        day['studied'] += entry.get('cards_studied', 1)
+        if entry.get('response') in ('correct', 'incorrect'):
+            day[entry['response']] += 1
+        day['time'] += entry.get('time_spent', 0)
+
+def summarize_activity(activity, days=14, today=None):
+    """Daily rows for the last `days` days and per-category accuracy, from the rollups"""
+    today = today or datetime.now().date()
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        daily.append(dict(activity['daily'].get(day, empty_rollup()), date=day))
+
+    categories = []
+    for category, rollup in sorted(activity['categories'].items()):
+        answered = rollup['correct'] + rollup['incorrect']
+        accuracy = round(rollup['correct'] / answered * 100, 1) if answered else 0
+        categories.append(dict(rollup, category=category, accuracy=accuracy))
+
+    return {
+        'daily': daily,
+        'categories': categories,
+        'studied': sum(row['studied'] for row in daily),
+        'minutes': round(sum(row['time'] for row in daily) / 60, 1)
+    }
+
+def record_quiz_attempt(stats, quiz_scores, attempt):
+    """Fold one quiz attempt into the aggregates and the latest-per-type scores.
+
+    Only running totals change, so the dashboards can read the aggregates
+    directly instead of replaying the attempt history.
+    """
+    percentage = attempt['percentage']
+    stats['attempts'] += 1
+    stats['correct'] += attempt['score']
+    stats['answered'] += attempt['total']
+    for topic_key, perf in attempt['topic_performance'].items():
+        if perf.get('total'):
+            topic = stats['topics'].setdefault(topic_key.replace('topic_', ''), {'correct': 0, 'total': 0})
+            topic['correct'] += perf['correct']
+            topic['total'] += perf['total']
+    stats['recent'].append(percentage)
+    del stats['recent'][:-QUIZ_ROLLING_ATTEMPTS]
+
+    previous = quiz_scores.get(attempt['quiz_type'])
+    if previous is None:
+        stats['quiz_types'] += 1
     else:
-        print("Failed to parse study content")
+        stats['below_target'] -= previous.get('percentage', 0) < QUIZ_TARGET_PERCENT
+    stats['below_target'] += percentage < QUIZ_TARGET_PERCENT
+    quiz_scores[attempt['quiz_type']] = {key: value for key, value in attempt.items() if key != 'quiz_type'}
 
-def init_user_session():
-    """Initialize user session data"""
-    if 'progress' not in session:
-        session['progress'] = {
-            'topics_completed': [],
-            'topics_started': [],  # Track which topics have been started
-            'current_topic': 1,
-            'current_section': 0,
-            'current_chunk': 0,
-            'quiz_scores': {},
-            'study_streak': 0,
-            'last_study_date': None,
-            'study_notes': {},  # User's personal study notes
-            'bookmarks': []  # Bookmarked sections
-        }
+def load_quiz_stats(progress):
+    """The user's quiz aggregates, folding in scores saved before attempts were logged"""
+    stats = progress['quiz_stats']
+    if not stats['attempts'] and progress['quiz_scores']:
+        legacy = sorted(progress['quiz_scores'].items(), key=lambda item: item[1].get('date') or '')
+        progress['quiz_scores'] = {}
+        for quiz_type, score_data in legacy:
+            attempt = dict(score_data, quiz_type=quiz_type)
+            attempt.setdefault('topic_performance', {})
+            progress_store.append_attempt(ensure_user_id(), attempt)
+            record_quiz_attempt(stats, progress['quiz_scores'], attempt)
+    return stats
 
-    # Ensure flashcard_progress exists (for backward compatibility)
-    if 'flashcard_progress' not in session['progress']:
-        session['progress']['flashcard_progress'] = {
-            'cards_studied': [],  # List of card IDs studied
-            'cards_mastered': [],  # List of card IDs mastered
-            'review_queue': [],  # Cards due for review
-            'study_sessions': [],  # Track study sessions
-            'last_flashcard_date': None,
-            'stats': {
-                'total_studied': 0,
-                'total_mastered': 0,
-                'study_time': 0,  # in minutes
-                'current_streak': 0
-            }
-        }
+def load_flashcard_progress():
+    """Load a copy of flashcard progress with its card sets decoded into CardBitsets"""
+    progress = copy.deepcopy(load_progress('flashcard_progress')['flashcard_progress'])
+    for key in FLASHCARD_BITSETS:
+        progress[key] = CardBitset.from_value(progress.get(key))
+    return progress
 
-    # Ensure flashcard_progress.stats exists
-    if 'stats' not in session['progress']['flashcard_progress']:
-        session['progress']['flashcard_progress']['stats'] = {
-            'total_studied': 0,
-            'total_mastered': 0,
-            'study_time': 0,  # in minutes
-            'current_streak': 0
-        }
-    
-    # Ensure study_notes and bookmarks exist
-    if 'study_notes' not in session['progress']:
-        session['progress']['study_notes'] = {}
-    if 'bookmarks' not in session['progress']:
-        session['progress']['bookmarks'] = []
+def count_flashcard(counters, card, field, delta):
+    """Adjust one card's category/difficulty counter by delta"""
+    by_difficulty = counters.setdefault(card.get('category', 'unknown'), {})
+    counts = by_difficulty.setdefault(str(card.get('difficulty')), {'studied': 0, 'mastered': 0})
+    counts[field] += delta
+
+def reconcile_flashcard_counters(progress, content):
+    """Rebuild the mastery counters from the card bitsets if the deck has changed.
+
+    Returns True if the counters were rebuilt and need saving.
+    """
+    if progress.get('counters_deck') == content['flashcard_deck_version']:
+        return False
+    by_id = content['flashcards_by_id']
+    counters = {}
+    for key, field in (('cards_studied', 'studied'), ('cards_mastered', 'mastered')):
+        for card_id in progress[key]:
+            if card_id in by_id:
+                count_flashcard(counters, by_id[card_id], field, 1)
+    progress['counters'] = counters
+    progress['counters_deck'] = content['flashcard_deck_version']
+    return True
+
+def save_flashcard_progress(progress):
+    """Encode flashcard bitsets, refresh their popcount totals and save"""
+    progress['stats']['total_studied'] = len(progress['cards_studied'])
+    progress['stats']['total_mastered'] = len(progress['cards_mastered'])
+    stored = dict(progress)
+    for key in FLASHCARD_BITSETS:
+        stored[key] = progress[key].encode()
+    current_progress()['flashcard_progress'] = stored
+
+def load_review_schedule(progress=None):
+    """Load the user's ReviewSchedule, folding in any legacy review queue"""
+    schedule = ReviewSchedule.from_value(load_progress('flashcard_schedule')['flashcard_schedule'])
+    if progress is not None:
+        schedule.add_due(progress['review_queue'], datetime.now())
+    return schedule
+
+def save_review_schedule(schedule):
+    """Store the schedule's per-card state"""
+    current_progress()['flashcard_schedule'] = schedule.encode()
 
 @app.route('/')
 def index():
     """Main dashboard"""
+    content = current_study_data()
     init_user_session()
     
     # Calculate study stats
-    progress = session['progress']
+    progress = load_progress('topics_completed', 'topics_started', 'current_topic',
+                             'quiz_scores', 'quiz_stats', 'last_study_date', 'flashcard_progress')
     total_topics = 5
     completed_topics = len(progress['topics_completed'])
     completion_percentage = (completed_topics / total_topics) * 100
@@ -664,7 +2918,7 @@ def index():
     readiness = calculate_exam_readiness(progress)
     
     return render_template('index.html', 
-                         study_data=study_data,
+                         study_data=content,
                          progress=progress,
                          completion_percentage=completion_percentage,
                          readiness=readiness)
@@ -672,88 +2926,65 @@ def index():
 @app.route('/study/<int:topic_num>')
 def study_topic(topic_num):
     """Study specific topic"""
+    content = current_study_data()
     init_user_session()
     
-    if f'topic_{topic_num}' not in study_data['topics']:
+    if f'topic_{topic_num}' not in content['topics']:
         return redirect(url_for('index'))
     
-    topic = study_data['topics'][f'topic_{topic_num}']
-    progress = session['progress']
+    topic = content['topics'][f'topic_{topic_num}']
+    progress = load_progress('topics_started', 'current_topic', 'current_section', 'current_chunk')
     
     # Mark topic as started when user visits it
-    if topic_num not in progress.get('topics_started', []):
-        if 'topics_started' not in progress:
-            progress['topics_started'] = []
+    if topic_num not in progress['topics_started']:
         progress['topics_started'].append(topic_num)
-        session['progress'] = progress
     
     # Set current topic if user is actually studying
     if progress['current_topic'] != topic_num:
         progress['current_topic'] = topic_num
         progress['current_section'] = 0
         progress['current_chunk'] = 0
-        session['progress'] = progress
     
     current_section = progress.get('current_section', 0)
     current_chunk = progress.get('current_chunk', 0)
+
+    related = {
+        f'{s}-{c}': related_links(content, ('topic', topic_num, s, c))
+        for s, section in enumerate(topic.get('sections', []))
+        for c in range(len(section.get('chunks', [])))
+    }
     
     return render_template('study.html', 
                          topic=topic,
                          current_section=current_section,
                          current_chunk=current_chunk,
+                         related=related,
                          progress=progress)
 
 @app.route('/quiz/<quiz_type>')
 def quiz(quiz_type):
     """Quiz interface"""
+    content = current_study_data()
     init_user_session()
     
     # Get custom quiz parameters from query string
     num_questions = request.args.get('num_questions', type=int, default=10)
     topics_filter = request.args.getlist('topics')  # Can select multiple topics
     
-    all_questions = study_data['practice_quiz']['questions']
+    quiz_data = content['practice_quiz']
 
     if quiz_type == 'practice':
-        questions = all_questions
-        # Randomly select specified number of questions
-        selected_questions = random.sample(questions, min(num_questions, len(questions)))
-        # Shuffle answer options for each question
-        for question in selected_questions:
-            if 'options' in question:
-                random.shuffle(question['options'])
+        # Randomly select questions, each with its own option order
+        selected_questions = sample_questions(quiz_data, num_questions)
     elif quiz_type == 'custom':
-        # Custom quiz with filters
-        questions = all_questions
-        
-        # Filter by topics if specified
-        if topics_filter:
-            filtered_questions = []
-            for topic in topics_filter:
-                topic_num = int(topic.replace('topic_', ''))
-                # Questions 1-10 for topic 1, 11-20 for topic 2, etc.
-                start_q = (topic_num - 1) * 10 + 1
-                end_q = topic_num * 10
-                filtered_questions.extend([q for q in questions if start_q <= q['number'] <= end_q])
-            questions = filtered_questions if filtered_questions else questions
-        
-        # Select random questions
-        selected_questions = random.sample(questions, min(num_questions, len(questions)))
-        for question in selected_questions:
-            if 'options' in question:
-                random.shuffle(question['options'])
+        # Custom quiz, optionally limited to the selected topics
+        topics = parse_topic_filter(topics_filter, quiz_data)
+        selected_questions = sample_questions(quiz_data, num_questions, topics or None)
     elif quiz_type.startswith('topic_'):
         # Topic-specific mini quiz
         topic_num = int(quiz_type.split('_')[1])
-        if f'topic_{topic_num}' in study_data['topics']:
-            # Get questions related to this topic
-            start_q = (topic_num - 1) * 10 + 1
-            end_q = topic_num * 10
-            topic_questions = [q for q in all_questions if start_q <= q['number'] <= end_q]
-            selected_questions = random.sample(topic_questions, min(num_questions, len(topic_questions)))
-            for question in selected_questions:
-                if 'options' in question:
-                    random.shuffle(question['options'])
+        if f'topic_{topic_num}' in content['topics']:
+            selected_questions = sample_questions(quiz_data, num_questions, [topic_num])
         else:
             selected_questions = []
     else:
@@ -761,42 +2992,37 @@ def quiz(quiz_type):
 
     return render_template('quiz.html',
                          questions=selected_questions,
+                         quiz_data=question_summaries(selected_questions),
                          quiz_type=quiz_type)
 
 @app.route('/quiz-builder')
 def quiz_builder():
     """Custom quiz builder interface"""
+    content = current_study_data()
     init_user_session()
-    return render_template('quiz_builder.html', study_data=study_data)
+    return render_template('quiz_builder.html', study_data=content)
 
 @app.route('/practice-exam')
 def practice_exam():
     """Full practice exam mode - simulates real AI-900 exam"""
+    content = current_study_data()
     init_user_session()
     
-    # Get all 50 questions
-    all_questions = study_data['practice_quiz']['questions']
-    
-    # Shuffle questions for exam randomization
-    import random
-    exam_questions = random.sample(all_questions, min(50, len(all_questions)))
-    
-    # Shuffle answer options for each question
-    for question in exam_questions:
-        if 'options' in question:
-            random.shuffle(question['options'])
+    # Shuffle up to 50 questions and their answer options for exam randomization
+    exam_questions = sample_questions(content['practice_quiz'], 50)
     
     return render_template('practice_exam.html',
                          questions=exam_questions,
+                         quiz_data=question_summaries(exam_questions),
                          exam_duration=60)  # 60 minutes
 
 @app.route('/weak-areas')
 def weak_areas():
     """Analyze quiz performance and create targeted study plan"""
+    content = current_study_data()
     init_user_session()
     
-    progress = session['progress']
-    quiz_scores = progress.get('quiz_scores', {})
+    progress = load_progress('quiz_scores', 'quiz_stats', 'topics_completed')
     
     # Analyze weak topics
     weak_topics = analyze_weak_areas(progress)
@@ -808,158 +3034,152 @@ def weak_areas():
                          weak_topics=weak_topics,
                          study_plan=study_plan,
                          progress=progress,
-                         study_data=study_data)
+                         study_data=content)
+
+# Service comparison data
+SERVICE_COMPARISONS = {
+    'vision': {
+        'title': 'Computer Vision Services',
+        'services': [
+            {
+                'name': 'Azure AI Vision',
+                'use_case': 'General-purpose image analysis',
+                'key_features': ['Image classification', 'Object detection', 'OCR', 'Face detection', 'Spatial analysis'],
+                'when_to_use': 'Pre-built models for common vision tasks'
+            },
+            {
+                'name': 'Custom Vision',
+                'use_case': 'Custom image classification/object detection',
+                'key_features': ['Train custom models', 'Image classification', 'Object detection', 'Export models'],
+                'when_to_use': 'Need domain-specific image recognition'
+            },
+            {
+                'name': 'Face API',
+                'use_case': 'Face detection and recognition',
+                'key_features': ['Face detection', 'Face verification', 'Face identification', 'Similar face finding'],
+                'when_to_use': 'Face-specific scenarios only'
+            }
+        ]
+    },
+    'language': {
+        'title': 'Natural Language Processing Services',
+        'services': [
+            {
+                'name': 'Azure AI Language',
+                'use_case': 'Text analysis and NLP',
+                'key_features': ['Sentiment analysis', 'Key phrase extraction', 'Entity recognition', 'Language detection', 'PII detection'],
+                'when_to_use': 'Pre-built NLP capabilities'
+            },
+            {
+                'name': 'Azure AI Translator',
+                'use_case': 'Text and document translation',
+                'key_features': ['90+ languages', 'Document translation', 'Custom translation', 'Transliteration'],
+                'when_to_use': 'Multi-language support needed'
+            },
+            {
+                'name': 'Azure AI Speech',
+                'use_case': 'Speech-to-text and text-to-speech',
+                'key_features': ['Speech recognition', 'Speech synthesis', 'Speech translation', 'Speaker recognition'],
+                'when_to_use': 'Audio/voice interactions'
+            }
+        ]
+    },
+    'conversational': {
+        'title': 'Conversational AI Services',
+        'services': [
+            {
+                'name': 'Azure Bot Service',
+                'use_case': 'Build and deploy chatbots',
+                'key_features': ['Multi-channel deployment', 'Bot Framework SDK', 'Integration with AI services'],
+                'when_to_use': 'Deploy bots across channels'
+            },
+            {
+                'name': 'Azure AI Language (CLU)',
+                'use_case': 'Conversational language understanding',
+                'key_features': ['Intent recognition', 'Entity extraction', 'Multi-turn conversations'],
+                'when_to_use': 'Custom conversational models'
+            },
+            {
+                'name': 'QnA Maker',
+                'use_case': 'Question & Answer from documents',
+                'key_features': ['FAQ automation', 'Knowledge base', 'Active learning'],
+                'when_to_use': 'FAQ/knowledge base scenarios'
+            }
+        ]
+    },
+    'ml': {
+        'title': 'Machine Learning Services',
+        'services': [
+            {
+                'name': 'Azure Machine Learning',
+                'use_case': 'Enterprise ML platform',
+                'key_features': ['AutoML', 'Designer', 'MLOps', 'Model deployment', 'Responsible AI dashboard'],
+                'when_to_use': 'Custom ML models and pipelines'
+            },
+            {
+                'name': 'Azure AI Services',
+                'use_case': 'Pre-built AI APIs',
+                'key_features': ['Vision', 'Language', 'Speech', 'Decision', 'OpenAI'],
+                'when_to_use': 'Use pre-built models quickly'
+            },
+            {
+                'name': 'Azure OpenAI Service',
+                'use_case': 'Generative AI models',
+                'key_features': ['GPT-4', 'GPT-3.5', 'DALL-E', 'Embeddings', 'Enterprise-ready'],
+                'when_to_use': 'Generative AI scenarios'
+            }
+        ]
+    }
+}
+
+# ML Techniques Comparison
+ML_TECHNIQUES = [
+    {
+        'name': 'Regression',
+        'type': 'Supervised Learning',
+        'output': 'Continuous numerical value',
+        'examples': ['Price prediction', 'Temperature forecasting', 'Sales forecasting'],
+        'key_point': 'Predicts numbers'
+    },
+    {
+        'name': 'Classification',
+        'type': 'Supervised Learning',
+        'output': 'Category/class label',
+        'examples': ['Spam detection', 'Image recognition', 'Sentiment analysis'],
+        'key_point': 'Predicts categories'
+    },
+    {
+        'name': 'Clustering',
+        'type': 'Unsupervised Learning',
+        'output': 'Groups/clusters',
+        'examples': ['Customer segmentation', 'Anomaly detection', 'Document grouping'],
+        'key_point': 'Finds patterns without labels'
+    }
+]
 
 @app.route('/service-comparison')
 def service_comparison():
     """Azure AI Service Comparison Tool"""
     init_user_session()
-    
-    # Service comparison data
-    comparisons = {
-        'vision': {
-            'title': 'Computer Vision Services',
-            'services': [
-                {
-                    'name': 'Azure AI Vision',
-                    'use_case': 'General-purpose image analysis',
-                    'key_features': ['Image classification', 'Object detection', 'OCR', 'Face detection', 'Spatial analysis'],
-                    'when_to_use': 'Pre-built models for common vision tasks'
-                },
-                {
-                    'name': 'Custom Vision',
-                    'use_case': 'Custom image classification/object detection',
-                    'key_features': ['Train custom models', 'Image classification', 'Object detection', 'Export models'],
-                    'when_to_use': 'Need domain-specific image recognition'
-                },
-                {
-                    'name': 'Face API',
-                    'use_case': 'Face detection and recognition',
-                    'key_features': ['Face detection', 'Face verification', 'Face identification', 'Similar face finding'],
-                    'when_to_use': 'Face-specific scenarios only'
-                }
-            ]
-        },
-        'language': {
-            'title': 'Natural Language Processing Services',
-            'services': [
-                {
-                    'name': 'Azure AI Language',
-                    'use_case': 'Text analysis and NLP',
-                    'key_features': ['Sentiment analysis', 'Key phrase extraction', 'Entity recognition', 'Language detection', 'PII detection'],
-                    'when_to_use': 'Pre-built NLP capabilities'
-                },
-                {
-                    'name': 'Azure AI Translator',
-                    'use_case': 'Text and document translation',
-                    'key_features': ['90+ languages', 'Document translation', 'Custom translation', 'Transliteration'],
-                    'when_to_use': 'Multi-language support needed'
-                },
-                {
-                    'name': 'Azure AI Speech',
-                    'use_case': 'Speech-to-text and text-to-speech',
-                    'key_features': ['Speech recognition', 'Speech synthesis', 'Speech translation', 'Speaker recognition'],
-                    'when_to_use': 'Audio/voice interactions'
-                }
-            ]
-        },
-        'conversational': {
-            'title': 'Conversational AI Services',
-            'services': [
-                {
-                    'name': 'Azure Bot Service',
-                    'use_case': 'Build and deploy chatbots',
-                    'key_features': ['Multi-channel deployment', 'Bot Framework SDK', 'Integration with AI services'],
-                    'when_to_use': 'Deploy bots across channels'
-                },
-                {
-                    'name': 'Azure AI Language (CLU)',
-                    'use_case': 'Conversational language understanding',
-                    'key_features': ['Intent recognition', 'Entity extraction', 'Multi-turn conversations'],
-                    'when_to_use': 'Custom conversational models'
-                },
-                {
-                    'name': 'QnA Maker',
-                    'use_case': 'Question & Answer from documents',
-                    'key_features': ['FAQ automation', 'Knowledge base', 'Active learning'],
-                    'when_to_use': 'FAQ/knowledge base scenarios'
-                }
-            ]
-        },
-        'ml': {
-            'title': 'Machine Learning Services',
-            'services': [
-                {
-                    'name': 'Azure Machine Learning',
-                    'use_case': 'Enterprise ML platform',
-                    'key_features': ['AutoML', 'Designer', 'MLOps', 'Model deployment', 'Responsible AI dashboard'],
-                    'when_to_use': 'Custom ML models and pipelines'
-                },
-                {
-                    'name': 'Azure AI Services',
-                    'use_case': 'Pre-built AI APIs',
-                    'key_features': ['Vision', 'Language', 'Speech', 'Decision', 'OpenAI'],
-                    'when_to_use': 'Use pre-built models quickly'
-                },
-                {
-                    'name': 'Azure OpenAI Service',
-                    'use_case': 'Generative AI models',
-                    'key_features': ['GPT-4', 'GPT-3.5', 'DALL-E', 'Embeddings', 'Enterprise-ready'],
-                    'when_to_use': 'Generative AI scenarios'
-                }
-            ]
-        }
-    }
-    
-    # ML Techniques Comparison
-    ml_techniques = [
-        {
-            'name': 'Regression',
-            'type': 'Supervised Learning',
-            'output': 'Continuous numerical value',
-            'examples': ['Price prediction', 'Temperature forecasting', 'Sales forecasting'],
-            'key_point': 'Predicts numbers'
-        },
-        {
-            'name': 'Classification',
-            'type': 'Supervised Learning',
-            'output': 'Category/class label',
-            'examples': ['Spam detection', 'Image recognition', 'Sentiment analysis'],
-            'key_point': 'Predicts categories'
-        },
-        {
-            'name': 'Clustering',
-            'type': 'Unsupervised Learning',
-            'output': 'Groups/clusters',
-            'examples': ['Customer segmentation', 'Anomaly detection', 'Document grouping'],
-            'key_point': 'Finds patterns without labels'
-        }
-    ]
-    
+
     return render_template('service_comparison.html',
-                         comparisons=comparisons,
-                         ml_techniques=ml_techniques)
+                         comparisons=SERVICE_COMPARISONS,
+                         ml_techniques=ML_TECHNIQUES)
 
 def analyze_weak_areas(progress):
     """Analyze quiz performance to identify weak topics"""
+    content = current_study_data()
     weak_topics = []
-    quiz_scores = progress.get('quiz_scores', {})
+    stats = load_quiz_stats(progress)
     
-    if not quiz_scores:
+    if not stats['attempts']:
         return []
     
-    # Aggregate performance by topic
+    # Per-topic totals over every attempt, kept up to date by record_quiz_attempt
     topic_performance = {}
     for i in range(1, 6):
-        topic_performance[i] = {'correct': 0, 'total': 0, 'percentage': 0}
-    
-    # Collect data from all quizzes
-    for quiz_type, score_data in quiz_scores.items():
-        topic_perf = score_data.get('topic_performance', {})
-        for topic_key, perf in topic_perf.items():
-            topic_num = int(topic_key.replace('topic_', ''))
-            topic_performance[topic_num]['correct'] += perf.get('correct', 0)
-            topic_performance[topic_num]['total'] += perf.get('total', 0)
+        totals = stats['topics'].get(str(i), {})
+        topic_performance[i] = {'correct': totals.get('correct', 0), 'total': totals.get('total', 0), 'percentage': 0}
     
     # Calculate percentages and identify weak topics
     for topic_num, perf in topic_performance.items():
@@ -970,7 +3190,7 @@ def analyze_weak_areas(progress):
             if perf['percentage'] < 70:
                 # Get topic info
                 topic_key = f'topic_{topic_num}'
-                topic_data = study_data['topics'].get(topic_key, {})
+                topic_data = content['topics'].get(topic_key, {})
                 
                 weak_topics.append({
                     'number': topic_num,
@@ -983,7 +3203,7 @@ def analyze_weak_areas(progress):
         elif topic_num not in progress.get('topics_completed', []):
             # Topic not studied yet
             topic_key = f'topic_{topic_num}'
-            topic_data = study_data['topics'].get(topic_key, {})
+            topic_data = content['topics'].get(topic_key, {})
             weak_topics.append({
                 'number': topic_num,
                 'title': topic_data.get('title', f'Topic {topic_num}'),
@@ -1079,11 +3299,8 @@ def generate_study_plan(weak_topics, progress):
 def update_progress():
     """Update user progress"""
     data = request.json
-    progress = session.get('progress', {})
-    
-    # Ensure topics_started exists
-    if 'topics_started' not in progress:
-        progress['topics_started'] = []
+    progress = load_progress('current_topic', 'current_section', 'current_chunk',
+                             'topics_completed', 'last_study_date')
     
     if 'topic' in data:
         progress['current_topic'] = data['topic']
@@ -1103,7 +3320,6 @@ def update_progress():
     if 'last_study_date' in data:
         progress['last_study_date'] = data['last_study_date']
     
-    session['progress'] = progress
     return jsonify({'status': 'success'})
 
 @app.route('/api/submit_quiz', methods=['POST'])
@@ -1118,41 +3334,41 @@ def submit_quiz():
     if len(answers) == 0:
         return jsonify({'error': 'No answers provided'}), 400
 
-    # Calculate score
-    correct_answers = study_data['practice_quiz']['answers']
-    score = 0
+    # Grade against the compiled answer key
+    content = current_study_data()
+    quiz_data = content['practice_quiz']
+    answer_key = content['answer_key']
+    graded = answer_key.grade([answers])
+    score = int(graded['score'][0])
     total = len(answers)
-    results = {}
+    response_store.record(answer_key, graded)
 
-    # Track performance by topic (basic implementation)
-    topic_performance = {f'topic_{i}': {'correct': 0, 'total': 0} for i in range(1, 6)}
+    topic_performance = {
+        f'topic_{topic}': {
+            'correct': int(graded['topic_correct'][0, i]),
+            'total': int(graded['topic_total'][0, i])
+        }
+        for i, topic in enumerate(answer_key.topic_ids)
+    }
 
+    results = {}
     for q_num, user_answer in answers.items():
         q_num = int(q_num)
-        if q_num in correct_answers:
-            is_correct = correct_answers[q_num]['correct'] == user_answer
-            if is_correct:
-                score += 1
-
-            # Basic topic mapping for performance tracking
-            topic_num = min(5, max(1, (q_num - 1) // 10 + 1))
-            topic_performance[f'topic_{topic_num}']['total'] += 1
-            if is_correct:
-                topic_performance[f'topic_{topic_num}']['correct'] += 1
-
+        column = answer_key.column(q_num)
+        if column is not None:
             results[q_num] = {
-                'correct': is_correct,
+                'correct': bool(graded['correct'][0, column]),
                 'user_answer': user_answer,
-                'correct_answer': correct_answers[q_num]['correct'],
-                'explanation': correct_answers[q_num]['explanation']
+                'correct_answer': quiz_data['answers'][q_num]['correct'],
+                'explanation': quiz_data['answers'][q_num]['explanation'],
+                'related': related_links(content, ('quiz', q_num), ('topic', 'flashcard'))
             }
 
-    # Update session with enhanced tracking
-    progress = session.get('progress', {})
-    if 'quiz_scores' not in progress:
-        progress['quiz_scores'] = {}
+    # Update stored progress with enhanced tracking
+    progress = load_progress('quiz_scores', 'quiz_stats', 'study_streak', 'last_quiz_date')
 
-    progress['quiz_scores'][quiz_type] = {
+    attempt = {
+        'quiz_type': quiz_type,
         'score': score,
         'total': total,
         'percentage': round((score / total * 100), 1) if total > 0 else 0,
@@ -1160,6 +3376,8 @@ def submit_quiz():
         'time_taken': time_taken,
         'topic_performance': topic_performance
     }
+    record_quiz_attempt(load_quiz_stats(progress), progress['quiz_scores'], attempt)
+    progress_store.append_attempt(ensure_user_id(), attempt)
 
     # Update study streak if quiz score >= 70%
     if score / total >= 0.7:
@@ -1167,7 +3385,7 @@ def submit_quiz():
         if progress.get('last_quiz_date'):
             last_quiz = datetime.fromisoformat(progress['last_quiz_date']).date()
             if (today - last_quiz).days == 1:
-                progress['study_streak'] = progress.get('study_streak', 0) + 1
+                progress['study_streak'] += 1
             elif (today - last_quiz).days > 1:
                 progress['study_streak'] = 1
         else:
@@ -1175,8 +3393,6 @@ def submit_quiz():
 
         progress['last_quiz_date'] = today.isoformat()
 
-    session['progress'] = progress
-
     return jsonify({
         'score': score,
         'total': total,
@@ -1186,61 +3402,183 @@ def submit_quiz():
         'time_taken': time_taken
     })
 
+@app.route('/api/quiz')
+def api_quiz():
+    """Generate a quiz as question numbers plus option orders.
+
+    The payload is fully determined by topics, count, seed and the question
+    bank version, so seeded requests are cacheable. Seeded requests must carry
+    the current bank version as ?version= so it is part of the cache key; any
+    other version is redirected (uncached) to the current one. Question text
+    comes from the versioned /api/questions/<version> endpoint.
+    """
+    quiz_data = current_study_data()['practice_quiz']
+    if request.args.get('seed', '').strip() and request.args.get('version') != quiz_data['version']:
+        args = request.args.to_dict(flat=False)
+        args['version'] = quiz_data['version']
+        response = redirect(url_for('api_quiz', **args))
+        response.cache_control.no_store = True
+        return response
+
+    count = max(0, min(request.args.get('count', type=int, default=10), len(quiz_data['questions'])))
+    topics = parse_topic_filter(request.args.getlist('topics'), quiz_data)
+    seed = request.args.get('seed', '').strip()
+    seeded = bool(seed)
+    if not seeded:
+        seed = str(random.getrandbits(32))
+
+    rng = random.Random(f"{quiz_data['version']}:{seed}")
+    views = sample_questions(quiz_data, count, topics or None, rng)
+
+    response = jsonify({
+        'version': quiz_data['version'],
+        'seed': seed,
+        'topics': topics,
+        'ids': [view.number for view in views],
+        'orders': [view.order for view in views],
+        'questions_url': url_for('api_questions', version=quiz_data['version'])
+    })
+    if seeded:
+        response.cache_control.public = True
+        response.cache_control.max_age = QUIZ_CACHE_SECONDS
+        response.add_etag()
+        return response.make_conditional(request)
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/api/questions/<version>')
+def api_questions(version):
+    """All question bodies for a question bank version (immutable, long-cached)"""
+    quiz_data = current_study_data()['practice_quiz']
+    if version != quiz_data['version']:
+        return jsonify({'error': 'Unknown question bank version', 'version': quiz_data['version']}), 404
+
+    response = jsonify({
+        'version': quiz_data['version'],
+        'questions': [question.to_dict() for question in quiz_data['questions']]
+    })
+    response.cache_control.public = True
+    response.cache_control.max_age = QUESTIONS_CACHE_SECONDS
+    response.cache_control.immutable = True
+    response.set_etag(quiz_data['version'])
+    return response.make_conditional(request)
+
+# Results per search request
+SEARCH_RESULTS = 10
+MAX_SEARCH_RESULTS = 50
+
+def search_results(content, query, limit=SEARCH_RESULTS, kinds=None):
+    """Search hits as dicts with a link and highlighted snippet"""
+    index = content['search_index']
+    results = []
+    for document, score in index.search(query, limit, kinds):
+        results.append({
+            'kind': document.kind,
+            'title': document.title,
+            'url': content_url(document.endpoint, document.params, document.anchor),
+            'snippet': index.snippet(document, query),
+            'score': round(score, 3)
+        })
+    return results
+
+def related_links(content, key, kinds=RELATED_KINDS):
+    """Precomputed related items for a content key as dicts with a link"""
+    return [{
+        'kind': document.kind,
+        'title': document.title,
+        'url': content_url(document.endpoint, document.params, document.anchor)
+    } for document in content['related'].related(key, kinds)]
+
 @app.route('/review')
 def review():
     """Review mode for key concepts"""
+    content = current_study_data()
     init_user_session()
     search_query = request.args.get('q', '').strip()
-    filtered_essentials = study_data['key_essentials']
+    filtered_essentials = content['key_essentials']
+    results = []
 
     if search_query:
-        # Filter sections based on search query
-        filtered_sections = []
-        for section in study_data['key_essentials'].get('sections', []):
-            # Search in title and content
-            if (search_query.lower() in section.get('title', '').lower() or
-                search_query.lower() in section.get('content', '').lower()):
-                filtered_sections.append(section)
+        # Key Essentials sections matching the query, best match first
+        sections = content['key_essentials'].get('sections', [])
+        matches = content['search_index'].search(search_query, len(sections), ['essentials'])
+        by_anchor = {f'section-{i}': section for i, section in enumerate(sections)}
         filtered_essentials = {
-            'title': study_data['key_essentials']['title'],
-            'sections': filtered_sections
+            'title': content['key_essentials']['title'],
+            'sections': [by_anchor[document.anchor] for document, _ in matches]
         }
+        # Matches from the rest of the study content
+        results = search_results(content, search_query, kinds=['topic', 'quiz', 'flashcard'])
 
     return render_template('review.html',
                          key_essentials=filtered_essentials,
-                         search_query=search_query)
+                         search_query=search_query,
+                         search_results=results)
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Type-ahead completions for services, section titles and flashcard terms"""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', SUGGEST_LIMIT, type=int)
+    if limit < 1 or limit > SUGGEST_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {SUGGEST_LIMIT}'}), 400
+
+    suggestions = current_study_data()['suggest_index'].suggest(query[:100], limit)
+    return jsonify({
+        'query': query,
+        'suggestions': [{
+            'text': entry.text,
+            'kind': entry.kind,
+            'url': content_url(entry.endpoint, entry.params, entry.anchor)
+        } for entry in suggestions]
+    })
+
+@app.route('/api/search')
+def api_search():
+    """Full-text search across topics, Key Essentials, quiz questions and flashcards"""
+    content = current_study_data()
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query required'}), 400
+    limit = request.args.get('limit', SEARCH_RESULTS, type=int)
+    if limit < 1 or limit > MAX_SEARCH_RESULTS:
+        return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}'}), 400
+
+    results = search_results(content, query, limit, request.args.getlist('kind') or None)
+    for result in results:
+        result['snippet'] = str(result['snippet'])
+    return jsonify({'query': query, 'results': results})
 
 @app.route('/analytics')
 def analytics():
     """Analytics dashboard showing quiz performance and exam readiness"""
+    content = current_study_data()
     init_user_session()
     
-    progress = session['progress']
-    quiz_scores = progress.get('quiz_scores', {})
+    progress = load_progress('quiz_scores', 'quiz_stats', 'topics_completed', 'study_streak',
+                             'flashcard_progress', 'flashcard_activity')
+    flashcard_activity = summarize_activity(progress['flashcard_activity'])
     
     # Calculate exam readiness
     readiness_score = calculate_exam_readiness(progress)
     
-    # Get quiz history
-    quiz_history = []
-    for quiz_type, score_data in quiz_scores.items():
-        quiz_history.append({
-            'quiz_type': quiz_type,
-            'score': score_data.get('score', 0),
-            'total': score_data.get('total', 0),
-            'percentage': score_data.get('percentage', 0),
-            'date': score_data.get('date', ''),
-            'time_taken': score_data.get('time_taken', 0)
-        })
-    
-    # Sort by date (newest first)
-    quiz_history.sort(key=lambda x: x['date'], reverse=True)
+    # Latest attempts from the history, newest first
+    attempts = progress_store.recent_attempts(progress.user_id, QUIZ_HISTORY_ROWS)
+    quiz_history = [{
+        'quiz_type': attempt.get('quiz_type', ''),
+        'score': attempt.get('score', 0),
+        'total': attempt.get('total', 0),
+        'percentage': attempt.get('percentage', 0),
+        'date': attempt.get('date', ''),
+        'time_taken': attempt.get('time_taken', 0)
+    } for attempt in attempts]
     
     return render_template('analytics.html',
                          progress=progress,
                          quiz_history=quiz_history,
+                         flashcard_activity=flashcard_activity,
                          readiness=readiness_score,
-                         study_data=study_data)
+                         study_data=content)
 
 def calculate_exam_readiness(progress):
     """Calculate exam readiness percentage based on multiple factors"""
@@ -1258,11 +3596,11 @@ def calculate_exam_readiness(progress):
     topics_score = (topics_completed / 5) * 30
     readiness['topics_score'] = topics_score
     
-    # Quiz performance (50% weight)
+    # Quiz performance (50% weight), from the rolling average of recent attempts
     quiz_score = 0  # Initialize to 0
-    quiz_scores = progress.get('quiz_scores', {})
-    if quiz_scores:
-        avg_percentage = sum(q.get('percentage', 0) for q in quiz_scores.values()) / len(quiz_scores)
+    quiz_stats = load_quiz_stats(progress)
+    if quiz_stats['attempts']:
+        avg_percentage = sum(quiz_stats['recent']) / len(quiz_stats['recent'])
         quiz_score = (avg_percentage / 100) * 50
         readiness['quiz_score'] = quiz_score
     else:
@@ -1284,18 +3622,17 @@ def calculate_exam_readiness(progress):
     readiness['ready'] = (
         readiness['overall'] >= 80 and
         topics_completed >= 5 and
-        quiz_scores and
-        all(q.get('percentage', 0) >= 80 for q in quiz_scores.values())
+        quiz_stats['quiz_types'] > 0 and
+        quiz_stats['below_target'] == 0
     )
     
     # Generate recommendations
     if topics_completed < 5:
         readiness['recommendations'].append(f'Complete {5 - topics_completed} more topic(s)')
     
-    if quiz_scores:
-        low_scores = [q for q in quiz_scores.values() if q.get('percentage', 0) < 80]
-        if low_scores:
-            readiness['recommendations'].append(f'Improve quiz scores (currently {len(low_scores)} below 80%)')
+    if quiz_stats['below_target']:
+        readiness['recommendations'].append(
+            f"Improve quiz scores (currently {quiz_stats['below_target']} below {QUIZ_TARGET_PERCENT}%)")
     
     if total_mastered < 30:
         readiness['recommendations'].append(f'Master more flashcards (current: {total_mastered}, target: 30+)')
@@ -1305,19 +3642,235 @@ def calculate_exam_readiness(progress):
     
     return readiness
 
+def cohort_summary(cohort_id, user_id=None):
+    """Size, readiness bands, top members and (if given) a member's standing"""
+    top = cohort_store.top(cohort_id)
+    for member in top:
+        member['you'] = member.pop('user_id') == user_id
+    return {
+        'cohort': cohort_id,
+        'size': cohort_store.size(cohort_id),
+        'distribution': cohort_store.distribution(cohort_id),
+        'top': top,
+        'standing': cohort_store.standing(cohort_id, user_id) if user_id else None
+    }
+
+@app.route('/cohort')
+def cohort():
+    """Current cohort's dashboard, or a form to join one"""
+    current_study_data()
+    init_user_session()
+    progress = load_progress('cohort')
+    if progress['cohort']:
+        return redirect(url_for('cohort_dashboard', cohort_id=progress['cohort']['id']))
+    return render_template('cohort.html', summary=None, membership=None)
+
+@app.route('/cohort/<cohort_id>')
+def cohort_dashboard(cohort_id):
+    """Leaderboard, readiness spread and the user's rank within a cohort"""
+    if not COHORT_ID_PATTERN.match(cohort_id):
+        return redirect(url_for('cohort'))
+    user_id = init_user_session()
+    membership = load_progress('cohort')['cohort']
+    summary = cohort_summary(cohort_id, user_id)
+    return render_template('cohort.html', summary=summary, membership=membership)
+
+@app.route('/api/cohort/<cohort_id>')
+def api_cohort(cohort_id):
+    """Cohort leaderboard and the user's standing as JSON"""
+    if not COHORT_ID_PATTERN.match(cohort_id):
+        return jsonify({'error': 'Invalid cohort code'}), 400
+    return jsonify(cohort_summary(cohort_id, init_user_session()))
+
+@app.route('/api/cohort/join', methods=['POST'])
+def join_cohort():
+    """Join (or switch to) a cohort under a display name"""
+    data = request.get_json(silent=True) or {}
+    cohort_id = str(data.get('cohort', '')).strip()
+    name = str(data.get('name', '')).strip()[:COHORT_NAME_CHARS]
+    if not COHORT_ID_PATTERN.match(cohort_id):
+        return jsonify({'error': 'Cohort codes are 1-32 letters, digits, - or _'}), 400
+    if not name:
+        return jsonify({'error': 'A display name is required'}), 400
+
+    progress = load_progress('cohort')
+    progress.user_id = ensure_user_id()
+    previous = progress['cohort']
+    if previous and previous['id'] != cohort_id:
+        cohort_store.remove(previous['id'], progress.user_id)
+    progress['cohort'] = {'id': cohort_id, 'name': name}
+    # The standing itself is pushed by sync_cohort_standing when the request finishes
+    return jsonify({'success': True, 'url': url_for('cohort_dashboard', cohort_id=cohort_id)})
+
+@app.route('/api/cohort/leave', methods=['POST'])
+def leave_cohort():
+    """Leave the current cohort"""
+    progress = load_progress('cohort')
+    if progress['cohort'] and progress.user_id:
+        cohort_store.remove(progress['cohort']['id'], progress.user_id)
+    progress['cohort'] = None
+    return jsonify({'success': True})
+
 @app.route('/debug/quiz')
 def debug_quiz():
     """Debug route to see parsed quiz data"""
-    quiz_data = study_data.get('practice_quiz', {})
+    content = current_study_data()
+    quiz_data = content.get('practice_quiz', {})
     return jsonify({
         'total_questions': len(quiz_data.get('questions', [])),
-        'sample_questions': quiz_data.get('questions', [])[:3],  # First 3 questions
+        'sample_questions': [q.to_dict() for q in quiz_data.get('questions', ())[:3]],  # First 3 questions
         'total_answers': len(quiz_data.get('answers', {}))
     })
 
+def admin_token():
+    """The request's admin token, aborting with 404 unless it matches ADMIN_TOKEN.
+
+    The token is checked on every request (query string or X-Admin-Token
+    header) rather than remembered in the session, whose signing key ships
+    with the app.
+    """
+    token = request.args.get('token') or request.headers.get('X-Admin-Token') or ''
+    if not ADMIN_TOKEN or not secrets.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        abort(404)
+    return token
+
+@app.route('/admin/item-stats')
+def admin_item_stats():
+    """Per-question difficulty, discrimination and distractor shares from the last item stats run"""
+    token = admin_token()
+    content = current_study_data()
+    quiz_data = content['practice_quiz']
+    stored = response_store.item_stats()
+
+    items = []
+    for question in quiz_data['questions']:
+        answer = quiz_data['answers'].get(question.number)
+        item = stored.get(question.number)
+        if answer is None:
+            continue
+        items.append({
+            'number': question.number,
+            'topic': question.topic,
+            'question': question.question,
+            'correct': answer['correct'],
+            'stats': item,
+            'flags': item_flags(item, answer['correct']) if item else []
+        })
+
+    sort = request.args.get('sort', 'number')
+    if sort in ('difficulty', 'discrimination'):
+        def sort_key(item):
+            value = item['stats'][sort] if item['stats'] else None
+            return (value is None, value or 0)
+        items.sort(key=sort_key)
+    elif sort == 'flagged':
+        items.sort(key=lambda item: -len(item['flags']))
+
+    computed = next(iter(stored.values()))['computed'] if stored else None
+    return render_template('item_stats.html', items=items, computed=computed, sort=sort, token=token,
+                           letters=AnswerKey.LETTERS, study_data=content)
+
+# Flashcards sent per page by /flashcards and /api/flashcards
+FLASHCARD_PAGE_SIZE = 20
+MAX_FLASHCARD_PAGE = 100
+
+# Feistel rounds for the seeded study-mode shuffle
+SHUFFLE_ROUNDS = 4
+
+def bucket_card_ids(content, category='all', difficulty='all'):
+    """Card ids matching the category/difficulty filters, precomputed at load"""
+    return content['flashcard_filters'].get((category, difficulty), np.zeros(0, dtype=np.int64))
+
+def shuffled_position(position, count, seed):
+    """Where position lands in a seeded shuffle of range(count).
+
+    A small Feistel network permutes the next even power of two, and
+    positions landing past count are walked through it again (at most a few
+    steps on average), so any page of a shuffled deck is found without
+    shuffling the rest.
+    """
+    half = max(1, ((count - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    keys = [zlib.crc32(f'{seed}:{round_}'.encode('utf-8')) for round_ in range(SHUFFLE_ROUNDS)]
+    while True:
+        left, right = position >> half, position & mask
+        for key in keys:
+            left, right = right, left ^ (zlib.crc32(right.to_bytes(4, 'little'), key) & mask)
+        position = (left << half) | right
+        if position < count:
+            return position
+
+def flashcard_page(content, mode='study', category='all', difficulty='all',
+                   cursor=None, limit=FLASHCARD_PAGE_SIZE, seed=None):
+    """One page of flashcards for a mode and filters.
+
+    Study mode visits the matching ids in a seeded shuffle (the client sends
+    the seed back so pages don't overlap) that maps each position on its own,
+    so a page only touches its own cards. New mode masks the matching ids
+    against the studied bitset and pages through the rest in deck order.
+    Review mode pages the user's due cards by (due, card_id) key. The cursor
+    is a position in the filter's ids (a "due:id" key for review), so cards
+    answered between page loads don't shift later pages. New and review
+    pages each take one vectorized pass over the filter or schedule, with no
+    per-card Python work outside the page. Only the first page (no cursor)
+    reports the total.
+    """
+    by_id = content['flashcards_by_id']
+    progress = load_flashcard_progress()
+    first_page = cursor is None
+    cards, next_cursor, total = [], None, None
+    ids = bucket_card_ids(content, category, difficulty)
+
+    if mode == 'review':
+        schedule = load_review_schedule(progress)
+        after = tuple(int(part) for part in cursor.split(':')) if cursor else None
+        page, remaining = schedule.due_page(datetime.now(), after, limit, ids)
+        cards = [by_id[card_id] for _, card_id in page]
+        if remaining > len(page):
+            next_cursor = f'{page[-1][0]}:{page[-1][1]}'
+        if first_page:
+            total = remaining
+    elif mode == 'new':
+        studied = np.unpackbits(np.frombuffer(bytes(progress['cards_studied'].bits), dtype=np.uint8), bitorder='little')
+        seen = np.zeros(len(ids), dtype=bool)
+        known = ids < len(studied)
+        seen[known] = studied[ids[known]].astype(bool)
+        fresh = np.flatnonzero(~seen)  # positions of unstudied cards in ids
+        start = np.searchsorted(fresh, int(cursor) if cursor else 0)
+        page = fresh[start:start + limit]
+        cards = [by_id[int(ids[position])] for position in page]
+        if start + limit < len(fresh):
+            next_cursor = str(int(page[-1]) + 1)
+        if first_page:
+            total = len(fresh)
+    else:
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        position = int(cursor) if cursor else 0
+        end = min(position + limit, len(ids))
+        cards = [by_id[int(ids[shuffled_position(p, len(ids), seed)])] for p in range(position, end)]
+        if end < len(ids):
+            next_cursor = str(end)
+        if first_page:
+            total = len(ids)
+
+    # If no cards match filters, show the start of the deck
+    if first_page and not cards:
+        cards = content.get('flashcards', [])[:FLASHCARD_PAGE_SIZE]
+        next_cursor, total = None, len(cards)
+
+    return {
+        'cards': cards,
+        'next_cursor': next_cursor,
+        'seed': seed,
+        'total': total,
+        'stats': progress['stats']
+    }
+
 @app.route('/flashcards')
 def flashcards():
     """Flashcard study interface"""
+    content = current_study_data()
     init_user_session()
 
     # Get filter parameters
@@ -1325,147 +3878,220 @@ def flashcards():
     difficulty = request.args.get('difficulty', 'all')
     mode = request.args.get('mode', 'study')  # study, review, or new
 
-    # Filter flashcards based on parameters
-    all_flashcards = study_data.get('flashcards', [])
-    filtered_cards = []
+    # Only the first page is rendered; the page pulls the rest from /api/flashcards
+    page = flashcard_page(content, mode, category, difficulty)
 
-    for card in all_flashcards:
-        # Apply category filter
-        if category != 'all' and card.get('category') != category:
-            continue
+    return render_template('flashcards.html',
+                         flashcards=page['cards'],
+                         next_cursor=page['next_cursor'],
+                         seed=page['seed'],
+                         total_cards=page['total'],
+                         category=category,
+                         difficulty=difficulty,
+                         mode=mode,
+                         stats=page['stats'])
 
-        # Apply difficulty filter
-        if difficulty != 'all' and card.get('difficulty') != difficulty:
-            continue
+@app.route('/api/flashcards')
+def api_flashcards():
+    """Page through flashcards for a mode and filters as JSON"""
+    content = current_study_data()
+    init_user_session()
 
-        # Apply mode filter
-        if mode == 'new':
-            # Only show cards not studied yet
-            progress = session['progress']['flashcard_progress']
-            if card['id'] in progress['cards_studied']:
-                continue
-        elif mode == 'review':
-            # Only show cards due for review
-            progress = session['progress']['flashcard_progress']
-            if card['id'] not in progress['review_queue']:
-                continue
+    category = request.args.get('category', 'all')
+    difficulty = request.args.get('difficulty', 'all')
+    mode = request.args.get('mode', 'study')
+    if mode not in ('study', 'review', 'new'):
+        return jsonify({'error': 'Unknown mode'}), 400
 
-        filtered_cards.append(card)
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', FLASHCARD_PAGE_SIZE, type=int)
+    seed = request.args.get('seed', type=int)
+    if limit < 1 or limit > MAX_FLASHCARD_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_FLASHCARD_PAGE}'}), 400
+    if cursor and not re.fullmatch(r'\d+' if mode != 'review' else r'-?\d+:\d+', cursor):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    if mode == 'study' and cursor and seed is None:
+        return jsonify({'error': 'seed is required to continue a study session'}), 400
 
-    # If no cards match filters, show all cards
-    if not filtered_cards:
-        filtered_cards = all_flashcards[:20]  # Show first 20 cards
+    return jsonify(flashcard_page(content, mode, category, difficulty, cursor, limit, seed))
 
-    # Shuffle for study mode
-    if mode == 'study':
-        random.shuffle(filtered_cards)
+def parse_flashcard_response(item, flashcards_by_id):
+    """Validate one flashcard response payload.
 
-    # Get progress stats
-    progress = session['progress']['flashcard_progress']
-    stats = progress['stats']
+    Returns (card, response, study_time, when) or None if it is invalid.
+    client_ts (milliseconds since the epoch) dates the response when it is
+    plausible; otherwise the server time is used.
+    """
+    if not isinstance(item, dict):
+        return None
+    card_id = item.get('card_id')
+    response = item.get('response')  # 'correct' or 'incorrect'
+    study_time = item.get('study_time', 0)  # Time spent on this card in seconds
 
-    return render_template('flashcards.html',
-                         flashcards=filtered_cards,
-                         category=category,
-                         difficulty=difficulty,
-                         mode=mode,
-                         stats=stats)
+    if not isinstance(card_id, int) or isinstance(card_id, bool) or response not in ['correct', 'incorrect']:
+        return None
+    if card_id not in flashcards_by_id:
+        return None
+    if not isinstance(study_time, (int, float)) or study_time < 0:
+        study_time = 0
 
-@app.route('/api/flashcard_response', methods=['POST'])
-def flashcard_response():
-    """Handle flashcard response (correct/incorrect)"""
-    data = request.json
-    card_id = data.get('card_id')
-    response = data.get('response')  # 'correct' or 'incorrect'
-    study_time = data.get('study_time', 0)  # Time spent on this card in seconds
+    now = datetime.now()
+    when = now
+    client_ts = item.get('client_ts')
+    if isinstance(client_ts, (int, float)):
+        try:
+            stamped = datetime.fromtimestamp(client_ts / 1000)
+        except (OverflowError, OSError, ValueError):
+            stamped = None
+        if stamped and now - timedelta(days=1) <= stamped <= now:
+            when = stamped
 
-    if not card_id or response not in ['correct', 'incorrect']:
-        return jsonify({'error': 'Invalid data'}), 400
+    return flashcards_by_id[card_id], response, study_time, when
 
-    init_user_session()
-    progress = session['progress']['flashcard_progress']
+def apply_flashcard_response(progress, schedule, activity, card, response, study_time, when):
+    """Apply one flashcard response to decoded flashcard progress, schedule and activity"""
+    card_id = card['id']
+    previous = schedule.cards.get(card_id)
     stats = progress['stats']
 
+    counters = progress['counters']
+
     # Update cards studied
-    if card_id not in progress['cards_studied']:
-        progress['cards_studied'].append(card_id)
-        stats['total_studied'] += 1
+    if progress['cards_studied'].add(card_id):
+        count_flashcard(counters, card, 'studied', 1)
 
     # Handle response
     if response == 'correct':
-        # Add to mastered if not already there
-        if card_id not in progress['cards_mastered']:
-            progress['cards_mastered'].append(card_id)
-            stats['total_mastered'] += 1
-
-        # Remove from review queue if present
-        if card_id in progress['review_queue']:
-            progress['review_queue'].remove(card_id)
-
+        # Mark mastered and take it out of the review queue
+        if progress['cards_mastered'].add(card_id):
+            count_flashcard(counters, card, 'mastered', 1)
+        progress['review_queue'].discard(card_id)
     else:  # incorrect
-        # Add to review queue for later review
-        if card_id not in progress['review_queue']:
-            progress['review_queue'].append(card_id)
+        # Queue for later review and drop from mastered
+        progress['review_queue'].add(card_id)
+        if progress['cards_mastered'].discard(card_id):
+            count_flashcard(counters, card, 'mastered', -1)
 
-        # Remove from mastered if it was there
-        if card_id in progress['cards_mastered']:
-            progress['cards_mastered'].remove(card_id)
-            stats['total_mastered'] -= 1
+    # Work out when the card is next due
+    schedule.review(card_id, response == 'correct', when)
+    reschedule_due_summary(progress['due_summary'], previous[0] if previous else None, schedule.cards[card_id][0])
 
     # Update study time
     stats['study_time'] += study_time / 60  # Convert to minutes
 
-    # Update last flashcard date
-    today = datetime.now().date().isoformat()
-    progress['last_flashcard_date'] = today
-
-    # Update study streak
+    # Update study streak against the previous flashcard day
+    today = when.date()
     if progress.get('last_flashcard_date'):
         last_date = datetime.fromisoformat(progress['last_flashcard_date']).date()
-        today_date = datetime.now().date()
-        if (today_date - last_date).days == 1:
+        if (today - last_date).days == 1:
             stats['current_streak'] += 1
-        elif (today_date - last_date).days > 1:
+        elif (today - last_date).days > 1:
             stats['current_streak'] = 1
     else:
         stats['current_streak'] = 1
+    if not progress.get('last_flashcard_date') or progress['last_flashcard_date'] < today.isoformat():
+        progress['last_flashcard_date'] = today.isoformat()
 
-    # Record study session
-    progress['study_sessions'].append({
-        'date': datetime.now().isoformat(),
-        'cards_studied': 1,
-        'time_spent': study_time,
-        'response': response
-    })
+    # Roll the response up into bounded per-day and per-category activity
+    record_flashcard_activity(activity, card.get('category', 'unknown'), card_id, response, study_time, when)
 
-    session['progress'] = session['progress']  # Save changes
+def apply_flashcard_responses(items):
+    """Apply an ordered list of parsed responses in one load/save of progress"""
+    progress = load_flashcard_progress()
+    reconcile_flashcard_counters(progress, current_study_data())
+    schedule = load_review_schedule(progress)
+    now = datetime.now()
+    if not roll_due_summary(progress.get('due_summary'), now):
+        progress['due_summary'] = due_summary(schedule, now)
+    activity = load_progress('flashcard_activity')['flashcard_activity']
+    migrate_study_sessions(progress, activity)
 
+    for card, response, study_time, when in items:
+        apply_flashcard_response(progress, schedule, activity, card, response, study_time, when)
+
+    save_flashcard_progress(progress)
+    save_review_schedule(schedule)
     return jsonify({
         'success': True,
-        'stats': stats,
-        'review_queue_count': len(progress['review_queue'])
+        'applied': len(items),
+        'stats': progress['stats'],
+        'review_queue_count': len(progress['review_queue']),
+        'due_count': progress['due_summary']['due']
     })
 
+# Largest batch accepted by /api/flashcard_responses
+MAX_FLASHCARD_BATCH = 500
+
+@app.route('/api/flashcard_response', methods=['POST'])
+def flashcard_response():
+    """Handle flashcard response (correct/incorrect)"""
+    data = request.get_json(silent=True)
+    parsed = parse_flashcard_response(data, current_study_data()['flashcards_by_id'])
+    if parsed is None:
+        return jsonify({'error': 'Invalid data'}), 400
+
+    return apply_flashcard_responses([parsed])
+
+@app.route('/api/flashcard_responses', methods=['POST'])
+def flashcard_responses():
+    """Handle an ordered batch of flashcard responses in one request.
+
+    Each item has the same fields as /api/flashcard_response plus an
+    optional client_ts. The batch is rejected as a whole if any item is
+    invalid, so a client can safely retry it.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('responses') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'No responses provided'}), 400
+    if len(items) > MAX_FLASHCARD_BATCH:
+        return jsonify({'error': f'At most {MAX_FLASHCARD_BATCH} responses per batch'}), 400
+
+    flashcards_by_id = current_study_data()['flashcards_by_id']
+    parsed = []
+    for position, item in enumerate(items):
+        result = parse_flashcard_response(item, flashcards_by_id)
+        if result is None:
+            return jsonify({'error': 'Invalid data', 'index': position}), 400
+        parsed.append(result)
+
+    return apply_flashcard_responses(parsed)
+
 @app.route('/api/flashcard_stats')
 def flashcard_stats():
     """Get flashcard statistics"""
-    init_user_session()
-    progress = session['progress']['flashcard_progress']
+    content = current_study_data()
+    progress = load_flashcard_progress()
+    # Only store rebuilt counters for users with cards to count, so polling
+    # the stats never creates a user or a stored record on its own
+    has_cards = len(progress['cards_studied']) or len(progress['cards_mastered'])
+    changed = reconcile_flashcard_counters(progress, content)
+    # The schedule is only read when the stored due summary can't roll forward
+    summary = progress.get('due_summary')
+    if not roll_due_summary(summary, datetime.now()):
+        summary = progress['due_summary'] = due_summary(load_review_schedule(progress), datetime.now())
+        changed = True
+    if changed and has_cards and current_progress().user_id:
+        save_flashcard_progress(progress)
     stats = progress['stats']
 
     # Calculate additional stats
-    total_cards = len(study_data.get('flashcards', []))
+    total_cards = len(content.get('flashcards', []))
     mastered_percentage = (stats['total_mastered'] / total_cards * 100) if total_cards > 0 else 0
 
-    # Category breakdown
+    # Category and difficulty breakdown from the per-user counters and deck buckets
     category_stats = {}
-    for card in study_data.get('flashcards', []):
-        category = card.get('category', 'unknown')
-        if category not in category_stats:
-            category_stats[category] = {'total': 0, 'mastered': 0}
-        category_stats[category]['total'] += 1
-        if card['id'] in progress['cards_mastered']:
-            category_stats[category]['mastered'] += 1
+    difficulty_stats = {}
+    counters = progress['counters']
+    for category, by_difficulty in content['flashcard_buckets'].items():
+        category_row = category_stats[category] = {'total': 0, 'studied': 0, 'mastered': 0}
+        for difficulty, bucket in by_difficulty.items():
+            counts = counters.get(category, {}).get(str(difficulty), {})
+            difficulty_row = difficulty_stats.setdefault(str(difficulty), {'total': 0, 'studied': 0, 'mastered': 0})
+            for row in (category_row, difficulty_row):
+                row['total'] += len(bucket)
+                row['studied'] += counts.get('studied', 0)
+                row['mastered'] += counts.get('mastered', 0)
 
     return jsonify({
         'total_cards': total_cards,
@@ -1473,9 +4099,12 @@ def flashcard_stats():
         'mastered_cards': stats['total_mastered'],
         'mastered_percentage': round(mastered_percentage, 1),
         'review_queue': len(progress['review_queue']),
+        'due_now': summary['due'],
+        'scheduled_cards': summary['scheduled'],
         'study_time': round(stats['study_time'], 1),
         'current_streak': stats['current_streak'],
-        'category_stats': category_stats
+        'category_stats': category_stats,
+        'difficulty_stats': difficulty_stats
     })
 
 @app.route('/api/save_note', methods=['POST'])
@@ -1488,27 +4117,19 @@ def save_note():
     if not note_id:
         return jsonify({'error': 'Note ID required'}), 400
     
-    init_user_session()
-    progress = session.get('progress', {})
-    
-    if not progress.get('study_notes'):
-        progress['study_notes'] = {}
+    progress = load_progress('study_notes')
     
     progress['study_notes'][note_id] = {
         'text': note_text,
         'updated': datetime.now().isoformat()
     }
     
-    session['progress'] = progress
-    
     return jsonify({'success': True})
 
 @app.route('/api/get_notes')
 def get_notes():
     """Get all study notes"""
-    init_user_session()
-    progress = session.get('progress', {})
-    notes = progress.get('study_notes', {})
+    notes = load_progress('study_notes')['study_notes']
     return jsonify({'notes': notes})
 
 @app.route('/api/toggle_bookmark', methods=['POST'])
@@ -1520,11 +4141,7 @@ def toggle_bookmark():
     if not bookmark_id:
         return jsonify({'error': 'Bookmark ID required'}), 400
     
-    init_user_session()
-    progress = session.get('progress', {})
-    
-    if 'bookmarks' not in progress:
-        progress['bookmarks'] = []
+    progress = load_progress('bookmarks')
     
     if bookmark_id in progress['bookmarks']:
         progress['bookmarks'].remove(bookmark_id)
@@ -1533,8 +4150,6 @@ def toggle_bookmark():
         progress['bookmarks'].append(bookmark_id)
         bookmarked = True
     
-    session['progress'] = progress
-    
     return jsonify({'success': True, 'bookmarked': bookmarked})
 
 if __name__ == '__main__':
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Cohort Leaderboard Benchmark
+
+Fills a temporary cohort store with members of random readiness and times
+rank/percentile lookups, top-N reads and standing updates. Lookup time
+should stay flat as the cohort grows, since rank comes from the readiness
+Fenwick tree rather than counting members.
+
+Usage:
+    python benchmarks/bench_cohort.py [max_members]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import CohortStore
+
+
+def main():
+    max_members = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lookups = 2000
+
+    sizes = []
+    size = max_members
+    while size >= 1000 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 4
+
+    print(f"{'members':>10} {'us/update':>10} {'us/rank':>9} {'us/top10':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_members in sizes:
+            rng = random.Random(num_members)
+            store = CohortStore(os.path.join(directory, f'cohort_{num_members}.db'))
+            start = time.perf_counter()
+            for n in range(num_members):
+                store.update('bench', f'user{n}', f'User {n}', rng.uniform(0, 100), rng.randint(0, 30))
+            updated = (time.perf_counter() - start) / num_members
+
+            users = [f'user{rng.randrange(num_members)}' for _ in range(lookups)]
+            start = time.perf_counter()
+            for user_id in users:
+                store.standing('bench', user_id)
+            ranked = (time.perf_counter() - start) / lookups
+
+            start = time.perf_counter()
+            for _ in range(lookups):
+                store.top('bench')
+            topped = (time.perf_counter() - start) / lookups
+            print(f"{num_members:>10} {updated * 1e6:>10.1f} {ranked * 1e6:>9.1f} {topped * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
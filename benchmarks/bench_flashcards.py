@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Flashcard Deck Generation Benchmark
+
+Builds synthetic topic content of increasing size and times
+StudyContentParser.generate_flashcards() on each. Every tenth section
+restates an earlier definition under a new term, so near-duplicate merging
+has work to do. Time per card should stay flat as the content grows if the
+pipeline scales linearly.
+
+Usage:
+    python benchmarks/bench_flashcards.py [max_sections]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import StudyContentParser
+
+
+SYLLABLES = 'ka lo mi nu re sa ti vo ze da fe gi ho ju ly'.split()
+# Pseudo-word vocabulary about the size of the study guides' real vocabulary
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES[:5]][:1000]
+
+
+def sentence(rng, length=14):
+    """Random sentence from the word pool"""
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def synthetic_topics(parser, num_sections, topics=5):
+    """Build topic markdown with num_sections concept sections spread over topics"""
+    rng = random.Random(num_sections)
+    per_topic = max(1, num_sections // topics)
+    definitions = []
+    parsed = {}
+    for topic in range(1, topics + 1):
+        lines = [f'## Topic {topic}: Synthetic Topic (10–15%)', '']
+        for n in range(1, per_topic + 1):
+            concept = f'Concept {topic}-{n}'
+            if definitions and n % 10 == 0:
+                definition = rng.choice(definitions)
+            else:
+                definition = sentence(rng)
+                definitions.append(definition)
+            lines += [
+                f'#### {topic}.{n} Identify Features of {concept} Solutions',
+                definition,
+                '',
+                '- **Key Features**:',
+                '  - Output: Numeric or categorical values.',
+                '',
+                f'**{concept} Detail**',
+                sentence(rng),
+                ''
+            ]
+        parsed[f'topic_{topic}'] = parser.parse_topic_content(topic, '\n'.join(lines))
+    return parsed
+
+
+def main():
+    max_sections = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    parser = StudyContentParser()
+    parser.flashcard_ids_file = None  # don't write the id registry
+
+    sizes = []
+    size = max_sections
+    while size >= 500 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 2
+
+    print(f"{'sections':>10} {'cards':>8} {'merged':>8} {'seconds':>10} {'us/card':>10}")
+    for num_sections in sizes:
+        parser.topics = synthetic_topics(parser, num_sections)
+        parser.flashcard_ids = {}
+        start = time.perf_counter()
+        deck = parser.generate_flashcards()
+        elapsed = time.perf_counter() - start
+
+        merged = sum(len(card.get('aliases', ())) for card in deck)
+        assert len({card['id'] for card in deck}) == len(deck)
+        print(f"{num_sections:>10} {len(deck):>8} {merged:>8} {elapsed:>10.3f} {elapsed / len(deck) * 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
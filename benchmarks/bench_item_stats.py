@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Item Statistics Benchmark
+
+Fills a temporary response store with synthetic quiz responses and times
+the item statistics job (reading every row and computing difficulty,
+discrimination and option shares). Time per million rows should stay flat
+as the log grows, since all the math is per-chunk NumPy sums.
+
+Usage:
+    python benchmarks/bench_item_stats.py [max_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import StudyContentParser, AnswerKey, ResponseStore, compute_item_stats, item_stats_rows
+
+
+def fill_store(store, answer_key, num_rows, questions_per_attempt=10):
+    """Insert num_rows responses from simulated students of varying ability"""
+    rng = np.random.default_rng(num_rows)
+    attempts = num_rows // questions_per_attempt
+    ability = rng.random(attempts)
+    columns = rng.integers(0, len(answer_key.numbers), (attempts, questions_per_attempt))
+    knows = rng.random((attempts, questions_per_attempt)) < ability[:, None]
+    guesses = rng.integers(0, len(AnswerKey.LETTERS), (attempts, questions_per_attempt))
+    choices = np.where(knows, answer_key.correct[columns], guesses)
+    scores = (choices == answer_key.correct[columns]).sum(axis=1)
+
+    rows = np.column_stack([
+        answer_key.numbers[columns].ravel(),
+        choices.ravel(),
+        np.repeat(scores, questions_per_attempt),
+        np.full(attempts * questions_per_attempt, questions_per_attempt),
+        np.zeros(attempts * questions_per_attempt, dtype=np.int64)
+    ]).tolist()
+    conn = store.connection()
+    with conn:
+        conn.executemany(
+            'INSERT INTO responses (question, choice, score, answered, recorded) VALUES (?, ?, ?, ?, ?)', rows)
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 4000000
+    parser = StudyContentParser()
+    answer_key = AnswerKey(parser.parse_practice_quiz())
+
+    sizes = []
+    size = max_rows
+    while size >= 100000 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 2
+
+    print(f"{'rows':>10} {'read s':>8} {'stats s':>8} {'s/M rows':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_rows in sizes:
+            store = ResponseStore(os.path.join(directory, f'responses_{num_rows}.db'))
+            fill_store(store, answer_key, num_rows)
+
+            start = time.perf_counter()
+            chunks = list(store.chunks())
+            read = time.perf_counter() - start
+            start = time.perf_counter()
+            item_stats_rows(answer_key, compute_item_stats(answer_key, chunks))
+            computed = time.perf_counter() - start
+            total = read + computed
+            print(f"{num_rows:>10} {read:>8.2f} {computed:>8.2f} {total / num_rows * 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
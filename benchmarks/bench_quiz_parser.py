@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Practice Quiz Parser Benchmark
+
+Generates synthetic practice quiz banks of increasing size and times
+StudyContentParser.parse_quiz_content() on each. Time per question should
+stay flat as the bank grows if parsing scales linearly.
+
+Usage:
+    python benchmarks/bench_quiz_parser.py [max_questions]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import StudyContentParser
+
+
+def synthetic_quiz(num_questions, questions_per_topic=1000):
+    """Build practice quiz markdown with num_questions questions and answers"""
+    lines = ['# Azure AI-900 Practice Quiz', '', 'Synthetic question bank.', '']
+    for q in range(1, num_questions + 1):
+        if (q - 1) % questions_per_topic == 0:
+            topic = (q - 1) // questions_per_topic + 1
+            lines += [f'## Topic {topic}: Synthetic Topic ({questions_per_topic} questions)', '']
+        lines += [
+            f'{q}. Which Azure service handles scenario {q}, which mentions version 2. of the API?',
+            '   - A) Azure AI Vision',
+            '   - B) Azure AI Language',
+            '   - C) Azure OpenAI Service',
+            '   - D) Azure Machine Learning',
+            ''
+        ]
+
+    lines += ['# Answers and Explanations', '']
+    for q in range(1, num_questions + 1):
+        lines.append(f'{q}. {"ABCD"[q % 4]}) Option text - Explanation for question {q}.')
+    return '\n'.join(lines)
+
+
+def main():
+    max_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    parser = StudyContentParser()
+
+    sizes = []
+    size = max_questions
+    while size >= 1000 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 2
+
+    print(f"{'questions':>10} {'seconds':>10} {'us/question':>12}")
+    for num_questions in sizes:
+        content = synthetic_quiz(num_questions)
+        start = time.perf_counter()
+        quiz = parser.parse_quiz_content(content)
+        elapsed = time.perf_counter() - start
+
+        assert len(quiz['questions']) == num_questions
+        assert len(quiz['answers']) == num_questions
+        print(f"{num_questions:>10} {elapsed:>10.3f} {elapsed / num_questions * 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
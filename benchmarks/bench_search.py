@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Content Search Benchmark
+
+Builds SearchIndex over synthetic documents of increasing count and times
+a set of queries against each. Query latency should stay in single-digit
+milliseconds as the corpus grows, since only matching postings are read.
+
+Usage:
+    python benchmarks/bench_search.py [max_documents]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import SearchDocument, SearchIndex
+
+SYLLABLES = 'ka lo mi nu re sa ti vo ze da fe gi ho ju ly'.split()
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES][:3000]
+QUERIES = ['kaloka', 'mimimi sasasa', 'tivoze dafegi hojuly', 'azure vision service']
+
+
+def synthetic_documents(num_documents):
+    """Documents of 40-120 words drawn from a Zipf-like vocabulary"""
+    rng = random.Random(num_documents)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    documents = []
+    for n in range(num_documents):
+        words = rng.choices(WORDS, weights, k=rng.randint(40, 120))
+        documents.append(SearchDocument('topic', ('topic', 1, n, 0), f'Section {n}', ' '.join(words), 'index', (), None))
+    return documents
+
+
+def main():
+    max_documents = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = 20
+
+    sizes = []
+    size = max_documents
+    while size >= 1000 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 2
+
+    print(f"{'documents':>10} {'build s':>8} {'ms/query':>9}")
+    for num_documents in sizes:
+        documents = synthetic_documents(num_documents)
+        start = time.perf_counter()
+        index = SearchIndex(documents)
+        built = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for query in QUERIES:
+                results = index.search(query)
+                for document, _ in results:
+                    index.snippet(document, query)
+        elapsed = (time.perf_counter() - start) / (repeats * len(QUERIES))
+        print(f"{num_documents:>10} {built:>8.2f} {elapsed * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
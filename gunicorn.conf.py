@@ -0,0 +1,12 @@
+"""
+gunicorn settings for wsgi.py (read automatically from this directory)
+"""
+
+# Load the study content once in the parent so forked workers share it
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Each worker watches study-files itself; the parent's threads don't survive the fork"""
+    from app import content_service
+    content_service.watch()
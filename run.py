@@ -3,6 +3,12 @@
 Azure AI-900 Study App Runner
 
 This script starts the Flask development server for the Azure AI-900 study application.
+
+Usage:
+    python run.py                                Start the development server
+    python run.py build                          Validate study-files and write the compiled content artifact
+    python run.py grade SUBMISSIONS RESULTS      Grade a .jsonl/.csv file of quiz submissions into a results CSV
+    python run.py item-stats                     Recompute per-question statistics from all logged quiz responses
 """
 
 import sys
@@ -12,15 +18,44 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from app import app, init_study_data
+    from app import app, init_study_data, build_content_artifact, content_service, grade_submissions_file, run_item_stats_job
     
-    if __name__ == '__main__':
+    if __name__ == '__main__' and sys.argv[1:2] == ['build']:
+        print("🔨 Building compiled study content...")
+        
+        try:
+            artifact = build_content_artifact()
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        
+        print(f"✅ Wrote {artifact}")
+        
+    elif __name__ == '__main__' and sys.argv[1:2] == ['grade']:
+        if len(sys.argv) != 4:
+            print("Usage: python run.py grade SUBMISSIONS RESULTS")
+            sys.exit(1)
+        
+        print("📝 Grading quiz submissions...")
+        with open(sys.argv[3], 'w', encoding='utf-8', newline='') as results:
+            graded = grade_submissions_file(sys.argv[2], results)
+        print(f"✅ Graded {graded} submissions into {sys.argv[3]}")
+        
+    elif __name__ == '__main__' and sys.argv[1:2] == ['item-stats']:
+        print("📊 Computing question statistics...")
+        questions = run_item_stats_job()
+        print(f"✅ Updated statistics for {questions} questions")
+        
+    elif __name__ == '__main__':
         print("🚀 Starting Azure AI-900 Study App...")
         print("📚 Loading study materials...")
         
         # Initialize study data
         init_study_data()
         
+        # Pick up edits to study-files without restarting the server
+        content_service.watch()
+        
         print("✅ Study materials loaded successfully!")
         print("🌐 Starting web server...")
         print("📖 Open your browser to: http://localhost:5000")
@@ -0,0 +1,19 @@
+"""
+WSGI entry point for running the study app under a pre-forking server.
+
+Study content is loaded here, in the server's parent process. With
+gunicorn.conf.py's preload_app the workers are forked after that, so they
+all share the parent's copy of the study content instead of each loading
+its own:
+
+    gunicorn --workers 4 wsgi:app
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, init_study_data
+
+init_study_data()